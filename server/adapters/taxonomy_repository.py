@@ -12,15 +12,17 @@ import os
 # Add parent directory to path to import utils
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from utils.taxonomy_manager import taxonomy_manager
+from utils.taxonomy_manager import get_taxonomy_manager
 from server.domain.models import TaxonomyConcept, TaxonomyMetadata, SearchResult
 
 
 class TaxonomyRepository:
     """Repository for accessing taxonomy data - Adapter pattern"""
     
-    def __init__(self):
-        self.taxonomy_manager = taxonomy_manager
+    @property
+    def taxonomy_manager(self):
+        """Shared TaxonomyManager, created on first use"""
+        return get_taxonomy_manager()
     
     @contextmanager
     def _get_connection(self, taxonomy_id: str):
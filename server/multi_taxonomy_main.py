@@ -3,17 +3,26 @@
 Multi-Taxonomy MCP Server
 Servidor MCP actualizado para manejar múltiples taxonomías SKOS
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 import sqlite3
 import logging
 
-from utils.taxonomy_manager import taxonomy_manager
+from utils.taxonomy_manager import close_taxonomy_manager, get_taxonomy_manager
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Multi-Taxonomy SKOS MCP Server")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cerrar las conexiones SQLite agrupadas al apagar el servidor"""
+    try:
+        yield
+    finally:
+        close_taxonomy_manager()
+
+app = FastAPI(title="Multi-Taxonomy SKOS MCP Server", lifespan=lifespan)
 
 # Modelos Pydantic existentes con extensiones
 class SearchQuery(BaseModel):
@@ -69,7 +78,7 @@ def get_taxonomy_id_or_default(taxonomy_id: Optional[str] = None) -> str:
     """Obtener ID de taxonomía válido o default"""
     if taxonomy_id:
         # Validar que la taxonomía existe y está activa
-        metadata = taxonomy_manager.get_taxonomy_metadata(taxonomy_id)
+        metadata = get_taxonomy_manager().get_taxonomy_metadata(taxonomy_id)
         if not metadata:
             raise HTTPException(status_code=404, detail=f"Taxonomía '{taxonomy_id}' no encontrada")
         if not metadata.get("is_active", False):
@@ -77,7 +86,7 @@ def get_taxonomy_id_or_default(taxonomy_id: Optional[str] = None) -> str:
         return taxonomy_id
     else:
         try:
-            return taxonomy_manager.get_default_taxonomy_id()
+            return get_taxonomy_manager().get_default_taxonomy_id()
         except ValueError as e:
             raise HTTPException(status_code=503, detail=f"No hay taxonomías disponibles: {str(e)}")
 
@@ -90,7 +99,7 @@ async def search_concepts(query: SearchQuery):
     try:
         taxonomy_id = get_taxonomy_id_or_default(query.taxonomy_id)
         
-        with taxonomy_manager.get_db_connection(taxonomy_id) as conn:
+        with get_taxonomy_manager().get_db_connection(taxonomy_id) as conn:
             cursor = conn.cursor()
             
             # Búsqueda básica en prefLabel (mejorar con FTS si es necesario)
@@ -125,7 +134,7 @@ async def search_concepts(query: SearchQuery):
                 hits.append(hit)
         
         # Contar taxonomías disponibles
-        active_taxonomies = taxonomy_manager.get_active_taxonomies()
+        active_taxonomies = get_taxonomy_manager().get_active_taxonomies()
         
         return SearchResponse(
             hits=hits,
@@ -145,7 +154,7 @@ async def get_concept_context(query: GetContextQuery):
     try:
         taxonomy_id = get_taxonomy_id_or_default(query.taxonomy_id)
         
-        with taxonomy_manager.get_db_connection(taxonomy_id) as conn:
+        with get_taxonomy_manager().get_db_connection(taxonomy_id) as conn:
             cursor = conn.cursor()
             
             # Obtener concepto principal
@@ -187,7 +196,7 @@ async def validate_notation(query: ValidateNotationQuery):
     try:
         taxonomy_id = get_taxonomy_id_or_default(query.taxonomy_id)
         
-        with taxonomy_manager.get_db_connection(taxonomy_id) as conn:
+        with get_taxonomy_manager().get_db_connection(taxonomy_id) as conn:
             cursor = conn.cursor()
             
             sql = "SELECT uri, prefLabel, level FROM concepts WHERE notation = ?"
@@ -219,8 +228,8 @@ async def get_available_taxonomies():
     Obtener lista de taxonomías disponibles para MCP
     """
     try:
-        active_taxonomies = taxonomy_manager.get_active_taxonomies()
-        default_taxonomy = taxonomy_manager.get_default_taxonomy_id()
+        active_taxonomies = get_taxonomy_manager().get_active_taxonomies()
+        default_taxonomy = get_taxonomy_manager().get_default_taxonomy_id()
         
         return {
             "taxonomies": [
@@ -249,11 +258,11 @@ async def health_check():
     Verificar estado del servidor MCP y taxonomías
     """
     try:
-        active_taxonomies = taxonomy_manager.get_active_taxonomies()
+        active_taxonomies = get_taxonomy_manager().get_active_taxonomies()
         default_taxonomy = None
         
         try:
-            default_taxonomy = taxonomy_manager.get_default_taxonomy_id()
+            default_taxonomy = get_taxonomy_manager().get_default_taxonomy_id()
         except ValueError:
             pass
         
@@ -261,7 +270,7 @@ async def health_check():
         db_status = "disconnected"
         if default_taxonomy:
             try:
-                with taxonomy_manager.get_db_connection(default_taxonomy) as conn:
+                with get_taxonomy_manager().get_db_connection(default_taxonomy) as conn:
                     cursor = conn.cursor()
                     cursor.execute("SELECT COUNT(*) FROM concepts")
                     db_status = "connected"
@@ -318,8 +327,8 @@ if __name__ == "__main__":
     logger.info("Inicializando Multi-Taxonomy MCP Server...")
     
     try:
-        active_count = len(taxonomy_manager.get_active_taxonomies())
-        default_taxonomy = taxonomy_manager.get_default_taxonomy_id()
+        active_count = len(get_taxonomy_manager().get_active_taxonomies())
+        default_taxonomy = get_taxonomy_manager().get_default_taxonomy_id()
         logger.info(f"Servidor listo - {active_count} taxonomías activas, default: {default_taxonomy}")
     except Exception as e:
         logger.warning(f"Advertencia en inicialización: {e}")
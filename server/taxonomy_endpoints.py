@@ -12,7 +12,7 @@ import json
 from pathlib import Path
 import logging
 
-from utils.taxonomy_manager import taxonomy_manager
+from utils.taxonomy_manager import get_taxonomy_manager
 
 logger = logging.getLogger(__name__)
 
@@ -110,7 +110,7 @@ async def validate_taxonomy_file(
         try:
             # VALIDACIÓN SKOS ESTRICTA
             logger.info(f"Validando archivo: {file.filename}")
-            validation_result = taxonomy_manager.validate_skos_file(str(temp_file_path))
+            validation_result = get_taxonomy_manager().validate_skos_file(str(temp_file_path))
             
             return TaxonomyValidationResponse(
                 valid=validation_result["valid"],
@@ -166,7 +166,7 @@ async def upload_taxonomy(
             )
         
         # Validar que no exista la taxonomía
-        if taxonomy_manager.get_taxonomy_metadata(taxonomy_metadata.id):
+        if get_taxonomy_manager().get_taxonomy_metadata(taxonomy_metadata.id):
             raise HTTPException(status_code=409, detail=f"Taxonomía '{taxonomy_metadata.id}' ya existe")
         
         # Validar tamaño del archivo
@@ -184,7 +184,7 @@ async def upload_taxonomy(
             logger.info(f"Validando taxonomía '{taxonomy_metadata.id}'...")
             
             # Registrar la taxonomía (incluye validación automática)
-            result_metadata = taxonomy_manager.register_taxonomy(
+            result_metadata = get_taxonomy_manager().register_taxonomy(
                 taxonomy_metadata.id,
                 temp_file_path,
                 taxonomy_metadata.dict()
@@ -256,10 +256,10 @@ async def list_taxonomies(
     - **active_only**: Si es True, solo muestra taxonomías activas
     """
     try:
-        taxonomies_data = taxonomy_manager.list_taxonomies()
-        
         if active_only:
-            taxonomies_data = taxonomy_manager.get_active_taxonomies()
+            taxonomies_data = get_taxonomy_manager().get_active_taxonomies()
+        else:
+            taxonomies_data = get_taxonomy_manager().list_taxonomies()
         
         # Convertir a formato de respuesta
         taxonomies = [
@@ -294,7 +294,7 @@ async def get_taxonomy(taxonomy_id: str):
     
     - **taxonomy_id**: ID de la taxonomía
     """
-    metadata = taxonomy_manager.get_taxonomy_metadata(taxonomy_id)
+    metadata = get_taxonomy_manager().get_taxonomy_metadata(taxonomy_id)
     
     if not metadata:
         raise HTTPException(status_code=404, detail=f"Taxonomía '{taxonomy_id}' no encontrada")
@@ -310,7 +310,7 @@ async def activate_taxonomy(taxonomy_id: str, active: bool = Query(True, descrip
     - **active**: True para activar, False para desactivar
     """
     try:
-        taxonomy_manager.activate_taxonomy(taxonomy_id, active)
+        get_taxonomy_manager().activate_taxonomy(taxonomy_id, active)
         action = "activada" if active else "desactivada"
         
         return JSONResponse(
@@ -336,7 +336,7 @@ async def set_default_taxonomy(taxonomy_id: str):
     - **taxonomy_id**: ID de la taxonomía a establecer como default
     """
     try:
-        taxonomy_manager.set_default_taxonomy(taxonomy_id)
+        get_taxonomy_manager().set_default_taxonomy(taxonomy_id)
         
         return JSONResponse(
             content={
@@ -363,7 +363,7 @@ async def delete_taxonomy(taxonomy_id: str):
     ⚠️ **Advertencia**: Esta acción es irreversible
     """
     try:
-        taxonomy_manager.delete_taxonomy(taxonomy_id)
+        get_taxonomy_manager().delete_taxonomy(taxonomy_id)
         
         return JSONResponse(
             content={
@@ -386,14 +386,14 @@ async def get_taxonomy_stats(taxonomy_id: str):
     
     - **taxonomy_id**: ID de la taxonomía
     """
-    metadata = taxonomy_manager.get_taxonomy_metadata(taxonomy_id)
+    metadata = get_taxonomy_manager().get_taxonomy_metadata(taxonomy_id)
     
     if not metadata:
         raise HTTPException(status_code=404, detail=f"Taxonomía '{taxonomy_id}' no encontrada")
     
     try:
         # Obtener estadísticas adicionales de la base de datos
-        with taxonomy_manager.get_db_connection(taxonomy_id) as conn:
+        with get_taxonomy_manager().get_db_connection(taxonomy_id) as conn:
             cursor = conn.cursor()
             
             # Contar conceptos por nivel
@@ -413,8 +413,8 @@ async def get_taxonomy_stats(taxonomy_id: str):
             "basic_info": metadata,
             "concepts_by_level": concepts_by_level,
             "sample_concepts": sample_concepts,
-            "database_path": taxonomy_manager.get_db_path(taxonomy_id),
-            "is_operational": taxonomy_manager.get_db_path(taxonomy_id) is not None
+            "database_path": get_taxonomy_manager().get_db_path(taxonomy_id),
+            "is_operational": get_taxonomy_manager().get_db_path(taxonomy_id) is not None
         }
         
     except Exception as e:
@@ -27,7 +27,9 @@ def test_complete_async_system():
         "priority": 1
     }
     
-    response = requests.post("http://localhost:8000/classify/async", json=payload)
+    # Una sola sesión: el sondeo de estado reutiliza la conexión HTTP (keep-alive)
+    session = requests.Session()
+    response = session.post("http://localhost:8000/classify/async", json=payload)
     
     if response.status_code != 200:
         print(f"❌ Error creando job: {response.status_code}")
@@ -48,7 +50,7 @@ def test_complete_async_system():
     for i in range(max_checks):
         time.sleep(1)
         
-        status_response = requests.get(f"http://localhost:8000/classify/status/{job_id}")
+        status_response = session.get(f"http://localhost:8000/classify/status/{job_id}")
         if status_response.status_code == 200:
             status_data = status_response.json()
             status = status_data["status"]
@@ -69,7 +71,7 @@ def test_complete_async_system():
     print(f"\n🎉 3. Obteniendo resultados finales...")
     
     if status == "completed":
-        result_response = requests.get(f"http://localhost:8000/classify/result/{job_id}")
+        result_response = session.get(f"http://localhost:8000/classify/result/{job_id}")
         
         if result_response.status_code == 200:
             results = result_response.json()
@@ -38,10 +38,12 @@ def test_massive_async_classification():
         "priority": 1
     }
     
+    # Una sola sesión: el sondeo de estado reutiliza la conexión HTTP (keep-alive)
+    session = requests.Session()
     start_time = time.time()
     
     try:
-        response = requests.post("http://localhost:8000/classify/async", json=payload, timeout=30)
+        response = session.post("http://localhost:8000/classify/async", json=payload, timeout=30)
         
         if response.status_code != 200:
             print(f"❌ Error creando job: {response.status_code}")
@@ -74,7 +76,7 @@ def test_massive_async_classification():
         check_count += 1
         
         try:
-            status_response = requests.get(f"http://localhost:8000/classify/status/{job_id}")
+            status_response = session.get(f"http://localhost:8000/classify/status/{job_id}")
             
             if status_response.status_code == 200:
                 status_data = status_response.json()
@@ -110,7 +112,7 @@ def test_massive_async_classification():
         print(f"\n🎉 3. Analizando resultados finales...")
         
         try:
-            result_response = requests.get(f"http://localhost:8000/classify/result/{job_id}")
+            result_response = session.get(f"http://localhost:8000/classify/result/{job_id}")
             
             if result_response.status_code == 200:
                 results = result_response.json()
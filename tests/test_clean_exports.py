@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Unit tests for utils/clean_exports.py
+Testing export scanning, age/size classification and cleanup
+"""
+import os
+import time
+
+import pytest
+
+from utils import clean_exports
+from utils.clean_exports import scan_export_files, cleanup_old_files
+
+DAY = 86400
+
+
+def make_file(path, size_bytes=10, age_days=0):
+    """Crear archivo con tamaño y antigüedad controlados"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size_bytes)
+    mtime = time.time() - age_days * DAY
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def exports_dir(tmp_path, monkeypatch):
+    """Directorio de exports aislado para cada test"""
+    base = tmp_path / "exports"
+    base.mkdir()
+    monkeypatch.setattr(clean_exports, "EXPORTS_BASE_DIR", base)
+    return base
+
+
+class TestScanExportFiles:
+    """Test export file scanning"""
+
+    def test_missing_base_dir(self, tmp_path):
+        """Scanning a missing directory returns no files"""
+        assert scan_export_files(base_dir=tmp_path / "missing") == []
+
+    def test_scan_collects_file_info(self, exports_dir):
+        """Test that size, age and relative path are reported per file"""
+        path = make_file(exports_dir / "csv" / "2025-01-01" / "a.csv", size_bytes=2048, age_days=3)
+
+        files = scan_export_files(base_dir=exports_dir)
+
+        assert len(files) == 1
+        info = files[0]
+        assert info["name"] == "a.csv"
+        assert str(info["relative_path"]) == os.path.join("csv", "2025-01-01", "a.csv")
+        assert info["age_days"] == 3
+        assert abs(info["size_mb"] - 2048 / (1024 * 1024)) < 1e-9
+        assert info["modified"] == pytest.approx(path.stat().st_mtime)
+
+    def test_scan_sorted_newest_first(self, exports_dir):
+        """Test that sorted scans return files newest first"""
+        make_file(exports_dir / "csv" / "old.csv", age_days=5)
+        make_file(exports_dir / "json" / "new.json", age_days=1)
+        make_file(exports_dir / "mid.log", age_days=3)
+
+        names = [f["name"] for f in scan_export_files(base_dir=exports_dir, sort=True)]
+
+        assert names == ["new.json", "mid.log", "old.csv"]
+
+    def test_scan_filters_extensions_and_special_files(self, exports_dir):
+        """Test that only export extensions are returned and special files are skipped"""
+        make_file(exports_dir / "json" / "keep.JSON")
+        make_file(exports_dir / "csv" / "notes.txt")
+        make_file(exports_dir / "README.md")
+        make_file(exports_dir / ".gitignore")
+
+        names = [f["name"] for f in scan_export_files(base_dir=exports_dir)]
+
+        assert names == ["keep.JSON"]
+
+    def test_scan_custom_extensions(self, exports_dir):
+        """Test restricting the scan to custom extensions"""
+        make_file(exports_dir / "csv" / "a.csv")
+        make_file(exports_dir / "excel" / "b.xlsx")
+
+        names = [f["name"] for f in scan_export_files(base_dir=exports_dir, extensions=[".xlsx"])]
+
+        assert names == ["b.xlsx"]
+
+    def test_scan_skips_subdirs_of_other_export_types(self, exports_dir):
+        """Test that scanning mapped extensions only descends into their subdirs"""
+        make_file(exports_dir / "csv" / "2025-01-01" / "a.csv")
+        make_file(exports_dir / "temp" / "stray.csv")
+        make_file(exports_dir / "top.csv")
+
+        names = sorted(f["name"] for f in scan_export_files(base_dir=exports_dir, extensions=[".csv"]))
+
+        assert names == ["a.csv", "top.csv"]
+
+    def test_scan_unmapped_extension_walks_everything(self, exports_dir):
+        """Test that extensions without a subdir mapping fall back to a full walk"""
+        make_file(exports_dir / "csv" / "run.log")
+        make_file(exports_dir / "temp" / "stray.csv")
+
+        names = sorted(f["name"] for f in scan_export_files(base_dir=exports_dir, extensions=[".csv", ".log"]))
+
+        assert names == ["run.log", "stray.csv"]
+
+
+class TestCleanupOldFiles:
+    """Test cleanup of old and oversized exports"""
+
+    def test_dry_run_keeps_files(self, exports_dir):
+        """Test that dry run reports files without deleting them"""
+        old = make_file(exports_dir / "csv" / "old.csv", age_days=30)
+
+        stats = cleanup_old_files(dry_run=True, retention_days=7, max_size_mb=100, verbose=False)
+
+        assert stats["files_to_delete"] == 1
+        assert stats["deleted_count"] == 0
+        assert old.exists()
+
+    def test_execute_deletes_old_and_large_files(self, exports_dir):
+        """Test that old and oversized files are deleted and empty dirs removed"""
+        old = make_file(exports_dir / "csv" / "2025-01-01" / "old.csv", age_days=30)
+        large = make_file(exports_dir / "json" / "large.json", size_bytes=2 * 1024 * 1024)
+        fresh = make_file(exports_dir / "excel" / "fresh.xlsx", age_days=1)
+
+        stats = cleanup_old_files(dry_run=False, retention_days=7, max_size_mb=1, verbose=False)
+
+        assert stats["total_files"] == 3
+        assert stats["files_to_delete"] == 2
+        assert stats["deleted_count"] == 2
+        assert not old.exists()
+        assert not large.exists()
+        assert fresh.exists()
+        assert not (exports_dir / "csv").exists()
+        assert not (exports_dir / "json").exists()
+        assert exports_dir.exists()
+
+    def test_execute_without_io_uring(self, exports_dir, monkeypatch):
+        """Test that deletion falls back to threaded unlinkat without liburing"""
+        monkeypatch.setattr(clean_exports, "liburing", None)
+        old = make_file(exports_dir / "csv" / "old.csv", age_days=30)
+        fresh = make_file(exports_dir / "csv" / "fresh.csv", age_days=1)
+
+        stats = cleanup_old_files(dry_run=False, retention_days=7, max_size_mb=100, verbose=False)
+
+        assert stats["deleted_count"] == 1
+        assert not old.exists()
+        assert fresh.exists()
+
+    def test_stats_count_files_kept(self, exports_dir):
+        """Test that totals include files below both thresholds"""
+        make_file(exports_dir / "csv" / "old.csv", size_bytes=1024 * 1024, age_days=30)
+        make_file(exports_dir / "csv" / "fresh.csv", size_bytes=1024 * 1024, age_days=1)
+
+        stats = cleanup_old_files(dry_run=True, retention_days=7, max_size_mb=100, verbose=False)
+
+        assert stats["total_files"] == 2
+        assert stats["files_to_delete"] == 1
+        assert stats["total_size_mb"] == pytest.approx(2.0)
+        assert stats["delete_size_mb"] == pytest.approx(1.0)
@@ -5,6 +5,7 @@ Testing cost calculation logic, model pricing, and edge cases
 """
 from utils.openai_cost_calculator import (
     calculate_openai_cost,
+    calculate_openai_cost_batch,
     format_cost_info,
     extract_usage_from_response,
     get_model_pricing,
@@ -87,6 +88,15 @@ class TestCostCalculation:
         with pytest.raises(ValueError, match="Modelo 'unknown-model'"):
             calculate_openai_cost("unknown-model", 1000, 500)
     
+    def test_calculate_dated_model_uses_longest_prefix(self):
+        """Test that dated model names resolve to the most specific base model"""
+        cost_info = calculate_openai_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0)
+        assert cost_info.model == "gpt-4o-mini-2024-07-18"
+        assert abs(cost_info.prompt_cost_usd - 0.15) < 1e-9
+        
+        formatted = format_cost_info(calculate_openai_cost("gpt-4o-2024-08-06", 1000, 500))
+        assert formatted["cost_breakdown"]["base_model_for_pricing"] == "gpt-4o"
+    
     def test_calculate_cost_zero_tokens(self):
         """Test cost calculation with zero tokens"""
         cost_info = calculate_openai_cost("gpt-4o-mini", 0, 0)
@@ -96,6 +106,47 @@ class TestCostCalculation:
         assert cost_info.completion_cost_usd == 0.0
         assert cost_info.total_cost_usd == 0.0
 
+    def test_cost_info_is_immutable(self):
+        """Test that CostInfo records cannot be modified after creation"""
+        import pytest
+        cost_info = calculate_openai_cost("gpt-4o-mini", 1000, 500)
+        
+        with pytest.raises(AttributeError):
+            cost_info.total_cost_usd = 0.0
+        assert not hasattr(cost_info, "__dict__")
+
+class TestBatchCostCalculation:
+    """Test vectorized batch cost calculation"""
+    
+    def test_batch_matches_scalar_calculation(self):
+        """Test that batch costs match per-call scalar costs"""
+        import pytest
+        pytest.importorskip("numpy")
+        calls = [(500, 100), (300, 50), (996, 10)]
+        
+        batch = calculate_openai_cost_batch(
+            "gpt-4o-mini-2024-07-18",
+            [p for p, _ in calls],
+            [c for _, c in calls]
+        )
+        
+        assert batch["base_model_for_pricing"] == "gpt-4o-mini"
+        assert batch["calls"] == 3
+        assert batch["total_prompt_tokens"] == 1796
+        assert batch["total_completion_tokens"] == 160
+        for i, (prompt_tokens, completion_tokens) in enumerate(calls):
+            scalar = calculate_openai_cost("gpt-4o-mini", prompt_tokens, completion_tokens)
+            assert abs(batch["total_cost_usd"][i] - scalar.total_cost_usd) < 1e-6
+        expected_total = (1796 / 1_000_000) * 0.15 + (160 / 1_000_000) * 0.60
+        assert abs(batch["grand_total_usd"] - expected_total) < 1e-12
+    
+    def test_batch_unknown_model(self):
+        """Test batch calculation for unknown model raises ValueError"""
+        import pytest
+        pytest.importorskip("numpy")
+        with pytest.raises(ValueError, match="Modelo 'unknown-model'"):
+            calculate_openai_cost_batch("unknown-model", [1], [1])
+
 class TestUsageExtraction:
     """Test usage extraction from OpenAI responses"""
     
@@ -182,6 +233,16 @@ class TestCostFormatting:
         for key in cost_keys:
             assert key in formatted["cost_usd"], f"Missing cost_usd key: {key}"
 
+    def test_format_rounds_full_precision_costs(self):
+        """Test that costs keep full precision and are rounded only when formatted"""
+        cost_info = calculate_openai_cost("gpt-4o-mini", 7, 3)
+        
+        assert cost_info.prompt_cost_usd == (7 / 1_000_000) * 0.15
+        assert cost_info.total_cost_usd == cost_info.prompt_cost_usd + cost_info.completion_cost_usd
+        
+        formatted = format_cost_info(cost_info)
+        assert formatted["cost_usd"]["total"] == round(cost_info.total_cost_usd, 6)
+
 class TestIntegrationScenarios:
     """Test realistic integration scenarios"""
     
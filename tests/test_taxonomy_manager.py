@@ -0,0 +1,869 @@
+#!/usr/bin/env python3
+"""
+Unit tests for utils/taxonomy_manager.py
+Testing SKOS validation, SQLite ingestion and taxonomy registry operations
+"""
+import json
+import sqlite3
+from datetime import datetime
+
+import pytest
+from rdflib import Graph, Literal, Namespace, RDF, SKOS
+
+from utils import taxonomy_manager as taxonomy_manager_module
+from utils.taxonomy_manager import TaxonomyManager
+
+EX = Namespace("https://example.org/taxonomy/")
+
+
+def build_skos_graph(roots=3, children=3, grandchildren=2):
+    """Construir una taxonomía SKOS de tres niveles con definiciones y etiquetas"""
+    g = Graph()
+    g.bind("skos", SKOS)
+    scheme = EX["scheme"]
+    g.add((scheme, RDF.type, SKOS.ConceptScheme))
+
+    def add_concept(code, parent=None):
+        concept = EX[f"concept/{code}"]
+        g.add((concept, RDF.type, SKOS.Concept))
+        g.add((concept, SKOS.prefLabel, Literal(f"Concepto {code}", lang="es")))
+        g.add((concept, SKOS.altLabel, Literal(f"Alt {code}", lang="es")))
+        g.add((concept, SKOS.definition, Literal(f"Definición de {code}", lang="es")))
+        g.add((concept, SKOS.notation, Literal(code)))
+        g.add((concept, SKOS.inScheme, scheme))
+        if parent is None:
+            g.add((scheme, SKOS.hasTopConcept, concept))
+        else:
+            g.add((concept, SKOS.broader, parent))
+            g.add((parent, SKOS.narrower, concept))
+        return concept
+
+    for r in range(1, roots + 1):
+        root = add_concept(f"{r}")
+        for c in range(1, children + 1):
+            child = add_concept(f"{r}{c:02d}", root)
+            for gc in range(1, grandchildren + 1):
+                add_concept(f"{r}{c:02d}{gc:02d}", child)
+    return g
+
+
+@pytest.fixture
+def skos_file(tmp_path):
+    """Archivo JSON-LD con 30 conceptos en 3 niveles"""
+    path = tmp_path / "taxonomy.jsonld"
+    build_skos_graph().serialize(destination=str(path), format="json-ld")
+    return path
+
+
+@pytest.fixture
+def compact_skos_file(tmp_path):
+    """Archivo JSON-LD compacto (@context + @graph plano) como los exportados por TreeW"""
+    path = tmp_path / "compact.jsonld"
+    context = {"skos": str(SKOS), "ex": str(EX)}
+    build_skos_graph().serialize(destination=str(path), format="json-ld", context=context, auto_compact=True)
+    return path
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """TaxonomyManager sobre un directorio de taxonomías vacío"""
+    return TaxonomyManager(taxonomies_dir=str(tmp_path / "taxonomies"))
+
+
+class TestValidateSkosFile:
+    """Test SKOS validation"""
+
+    def test_valid_taxonomy(self, manager, skos_file):
+        """Test that a complete taxonomy passes validation with statistics"""
+        result = manager.validate_skos_file(str(skos_file))
+
+        assert result["valid"], result["errors"]
+        stats = result["statistics"]
+        assert stats["total_concepts"] == 30
+        assert stats["root_concepts"] == 3
+        assert stats["max_hierarchy_depth"] == 2
+        assert stats["concepts_with_definitions"] == 30
+        assert stats["orphaned_concepts"] == 0
+
+    def test_label_and_relation_statistics(self, manager, tmp_path):
+        """Test label and relation counts, including concepts without prefLabel"""
+        g = build_skos_graph()
+        g.add((EX["concept/1"], SKOS.prefLabel, Literal("Concept 1", lang="en")))
+        g.remove((EX["concept/2"], SKOS.prefLabel, None))
+        g.remove((EX["concept/3"], SKOS.definition, None))
+        g.add((EX["concept/101"], SKOS.related, EX["concept/201"]))
+        g.add((EX["concept/101"], SKOS.exactMatch, EX["external/1"]))
+        path = tmp_path / "stats.jsonld"
+        g.serialize(destination=str(path), format="json-ld")
+
+        result = manager.validate_skos_file(str(path))
+
+        stats = result["statistics"]
+        assert "⚠️ 1 conceptos sin skos:prefLabel" in result["warnings"]
+        assert stats["multilingual_concepts"] == 1
+        assert stats["concepts_with_definitions"] == 29
+        assert stats["hierarchical_relations"] == 54
+        assert stats["semantic_relations"] == 1
+        assert stats["external_mappings"] == 1
+
+    def test_orphaned_concepts(self, manager, tmp_path):
+        """Test that only concepts linked to no scheme in any direction count as orphans"""
+        g = build_skos_graph()
+        for code in ("101", "102", "103"):
+            g.remove((EX[f"concept/{code}"], SKOS.inScheme, None))
+        g.add((EX["concept/102"], SKOS.topConceptOf, EX["scheme"]))
+        g.add((EX["scheme"], SKOS.hasTopConcept, EX["concept/103"]))
+        path = tmp_path / "orphans.jsonld"
+        g.serialize(destination=str(path), format="json-ld")
+
+        result = manager.validate_skos_file(str(path))
+
+        assert result["valid"], result["errors"]
+        assert result["statistics"]["orphaned_concepts"] == 1
+
+    def test_hierarchy_depth_deep_chain_and_cycle(self, manager):
+        """Test that depth follows broader-only chains deeper than the recursion limit"""
+        g = Graph()
+        chain = [EX[f"chain/{i}"] for i in range(3000)]
+        for parent, child in zip(chain, chain[1:]):
+            g.add((child, SKOS.broader, parent))
+
+        assert manager._calculate_hierarchy_depth(g) == 2999
+
+        # The cycle chain[5] -> ... -> chain[10] -> chain[5] counts as one level
+        g.add((chain[10], SKOS.narrower, chain[5]))
+        assert manager._calculate_hierarchy_depth(g) == 2994
+
+    def test_hierarchy_depth_follows_longest_chain(self, manager):
+        """Test that a shortcut to a shared concept does not hide its longer path"""
+        g = Graph()
+        chain = [EX[f"chain/{i}"] for i in range(4)]
+        for parent, child in zip(chain, chain[1:]):
+            g.add((child, SKOS.broader, parent))
+        g.add((chain[3], SKOS.broader, chain[0]))
+        g.add((EX["leaf"], SKOS.broader, chain[3]))
+
+        assert manager._calculate_hierarchy_depth(g) == 4
+
+    def test_hierarchy_depth_narrower_only(self, manager):
+        """Test that concepts pointed to only by skos:narrower are not counted as roots"""
+        g = Graph()
+        chain = [EX[f"chain/{i}"] for i in range(4)]
+        for parent, child in zip(chain, chain[1:]):
+            g.add((parent, SKOS.narrower, child))
+            if child == chain[1]:
+                g.add((child, SKOS.broader, parent))
+
+        assert manager._calculate_hierarchy_depth(g) == 3
+
+    def test_streamed_jsonld_matches_rdflib(self, compact_skos_file):
+        """Test that the streamed JSON-LD reader yields the same triples as rdflib"""
+        pytest.importorskip("ijson")
+        expected = Graph().parse(str(compact_skos_file), format="json-ld")
+
+        graph = Graph()
+        taxonomy_manager_module._parse_jsonld_graph(str(compact_skos_file), graph)
+
+        assert set(graph) == set(expected)
+
+    def test_streamed_jsonld_falls_back_to_rdflib(self, manager, compact_skos_file):
+        """Test that contexts the streaming reader cannot apply are parsed by rdflib"""
+        document = json.loads(compact_skos_file.read_text())
+        document["@context"]["@language"] = "es"
+        compact_skos_file.write_text(json.dumps(document))
+
+        result = manager.validate_skos_file(str(compact_skos_file))
+
+        assert result["valid"], result["errors"]
+        assert result["statistics"]["total_concepts"] == 30
+
+    def test_remote_context_fetched_once_and_inlined(self, manager, compact_skos_file, monkeypatch):
+        """Test that a remote @context is downloaded once and stored inline with the original"""
+        pytest.importorskip("ijson")
+        url = "https://example.org/context.jsonld"
+        document = json.loads(compact_skos_file.read_text())
+        remote = {"@context": document["@context"]}
+        document["@context"] = url
+        compact_skos_file.write_text(json.dumps(document))
+        fetched = []
+
+        def fake_source_to_json(source):
+            fetched.append(source)
+            return remote, None
+
+        monkeypatch.setattr(taxonomy_manager_module, "source_to_json", fake_source_to_json)
+        monkeypatch.setattr(taxonomy_manager_module, "_remote_contexts", {})
+        monkeypatch.setattr(taxonomy_manager_module, "zstandard", None)
+
+        metadata = manager.register_taxonomy("example", compact_skos_file, {})
+
+        assert fetched == [url]
+        assert metadata["concepts_count"] == 30
+        stored = json.loads((manager.taxonomies_dir / "example" / "original.jsonld").read_text())
+        assert stored["@context"] == [remote["@context"]]
+
+    def test_parsed_graph_cached_by_content(self, manager, skos_file, monkeypatch):
+        """Test that revalidating the same content reuses the cached graph and depth"""
+        first = manager.validate_skos_file(str(skos_file))
+
+        def fail(*args):
+            raise AssertionError("graph should come from the cache")
+
+        monkeypatch.setitem(taxonomy_manager_module.SKOS_PARSERS, ".jsonld", fail)
+        monkeypatch.setattr(manager, "_calculate_hierarchy_depth", fail)
+        copy = skos_file.with_name("copy.jsonld")
+        copy.write_bytes(skos_file.read_bytes())
+
+        assert manager.validate_skos_file(str(copy))["statistics"] == first["statistics"]
+        assert len(list((manager.taxonomies_dir / ".cache").iterdir())) == 1
+
+        monkeypatch.undo()
+        build_skos_graph(roots=4).serialize(destination=str(copy), format="json-ld")
+        assert manager.validate_skos_file(str(copy))["statistics"]["total_concepts"] == 40
+
+    def test_hierarchy_depth_persisted_by_content(self, manager, skos_file, monkeypatch):
+        """Test that a new manager reuses the depth computed for the same content"""
+        first = manager.validate_skos_file(str(skos_file))
+
+        reopened = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+
+        def fail(*args):
+            raise AssertionError("depth should come from .depth_cache.json")
+
+        monkeypatch.setattr(reopened, "_calculate_hierarchy_depth", fail)
+        stats = reopened.validate_skos_file(str(skos_file))["statistics"]
+        assert stats["max_hierarchy_depth"] == first["statistics"]["max_hierarchy_depth"]
+
+    def test_unsupported_format(self, manager, tmp_path):
+        """Test that unknown file extensions are rejected"""
+        path = tmp_path / "taxonomy.csv"
+        path.write_text("uri,label\n")
+
+        result = manager.validate_skos_file(str(path))
+
+        assert not result["valid"]
+        assert "Formato de archivo no soportado" in result["errors"][0]
+
+    def test_too_small_taxonomy(self, manager, tmp_path):
+        """Test that taxonomies with fewer than 20 concepts are rejected"""
+        path = tmp_path / "small.jsonld"
+        build_skos_graph(roots=1, children=2, grandchildren=1).serialize(destination=str(path), format="json-ld")
+
+        result = manager.validate_skos_file(str(path))
+
+        assert not result["valid"]
+        assert "muy pequeña" in result["errors"][0]
+
+
+class TestRegisterTaxonomy:
+    """Test taxonomy registration and SQLite ingestion"""
+
+    def test_register_populates_sqlite(self, manager, skos_file):
+        """Test that concepts and relationships are ingested into SQLite"""
+        metadata = manager.register_taxonomy("example", skos_file, {"name": "Example"})
+
+        assert metadata["concepts_count"] == 30
+        # 27 broader + 27 narrower
+        assert metadata["relationships_count"] == 54
+        with manager.get_db_connection("example") as conn:
+            row = conn.execute(
+                "SELECT prefLabel, notation FROM concepts WHERE uri = ?",
+                (str(EX["concept/10101"]),)
+            ).fetchone()
+        assert row == ("Concepto 10101", "10101")
+
+    @pytest.mark.parametrize("streaming", [True, False])
+    def test_ingest_compact_jsonld(self, manager, compact_skos_file, tmp_path, monkeypatch, streaming):
+        """Test that streamed and rdflib ingestion produce the same rows"""
+        if streaming:
+            pytest.importorskip("ijson")
+
+            def fail(*args):
+                raise AssertionError("compact JSON-LD should be streamed")
+
+            monkeypatch.setattr(taxonomy_manager_module, "_parse_rdflib_graph", fail)
+        else:
+            monkeypatch.setattr(taxonomy_manager_module, "ijson", None)
+        db_path = tmp_path / "compact.sqlite"
+
+        stats = manager._process_taxonomy_to_sqlite(compact_skos_file, db_path)
+
+        assert stats["concepts_count"] == 30
+        assert stats["relationships_count"] == 54
+        with sqlite3.connect(str(db_path)) as conn:
+            row = conn.execute(
+                "SELECT prefLabel, definition, notation FROM concepts WHERE uri = ?",
+                (str(EX["concept/10202"]),)
+            ).fetchone()
+            broader = conn.execute(
+                "SELECT object FROM relationships WHERE subject = ? AND predicate = 'broader'",
+                (str(EX["concept/10202"]),)
+            ).fetchall()
+        assert row == ("Concepto 10202", "Definición de 10202", "10202")
+        assert broader == [(str(EX["concept/102"]),)]
+
+    @pytest.mark.parametrize("document", [
+        pytest.param({
+            "@context": {"skos": str(SKOS), "prefLabel": {"@id": "skos:prefLabel", "@container": "@language"}},
+            "@graph": [
+                {"@id": "http://ex/a", "@type": "skos:Concept", "prefLabel": {"es": "Uno"}},
+                {"@id": "http://ex/b", "@type": "skos:Concept", "prefLabel": {"es": "Dos"},
+                 "skos:broader": {"@id": "http://ex/a"}},
+            ],
+        }, id="language-map"),
+        pytest.param({
+            "@context": {"@vocab": str(SKOS), "skos": str(SKOS)},
+            "@graph": [
+                {"@id": "http://ex/a", "@type": "skos:Concept", "prefLabel": "Uno"},
+                {"@id": "http://ex/b", "@type": "skos:Concept", "prefLabel": "Dos", "broader": {"@id": "http://ex/a"}},
+            ],
+        }, id="vocab"),
+        pytest.param({
+            "@context": {"@base": "http://ex/", "skos": str(SKOS)},
+            "@graph": [
+                {"@id": "a", "@type": "skos:Concept", "skos:prefLabel": "Uno"},
+                {"@id": "b", "@type": "skos:Concept", "skos:prefLabel": "Dos", "skos:broader": {"@id": "a"}},
+            ],
+        }, id="base"),
+        pytest.param({
+            "@context": {"skos": str(SKOS)},
+            "@graph": [
+                {"@id": "http://ex/a", "@type": "skos:Concept", "skos:prefLabel": {"@value": "Uno", "@language": "es"}},
+                {"@id": "b", "@type": "skos:Concept", "skos:prefLabel": "Dos", "skos:broader": {"@id": "http://ex/a"}},
+            ],
+        }, id="relative-iri"),
+        pytest.param({
+            "@context": {"skos": str(SKOS)},
+            "@graph": [
+                {"@id": "http://ex/a", "@type": "skos:Concept", "skos:prefLabel": "Uno"},
+                {"@id": "_:b0", "@type": "skos:Concept", "skos:prefLabel": "Dos", "skos:broader": {"@id": "http://ex/a"}},
+            ],
+        }, id="blank-node"),
+    ])
+    def test_ingest_unsupported_jsonld_matches_rdflib(self, manager, tmp_path, monkeypatch, document):
+        """Test that JSON-LD the streaming reader cannot handle is ingested like rdflib does"""
+        pytest.importorskip("ijson")
+        path = tmp_path / "shape.jsonld"
+        path.write_text(json.dumps(document), encoding="utf-8")
+
+        def rows(db_path):
+            with sqlite3.connect(str(db_path)) as conn:
+                return (sorted(conn.execute("SELECT uri, prefLabel FROM concepts")),
+                        sorted(conn.execute("SELECT subject, predicate, object FROM relationships")))
+
+        manager._process_taxonomy_to_sqlite(path, tmp_path / "streamed.sqlite")
+        monkeypatch.setattr(taxonomy_manager_module, "ijson", None)
+        manager._process_taxonomy_to_sqlite(path, tmp_path / "rdflib.sqlite")
+
+        concepts, relationships = rows(tmp_path / "streamed.sqlite")
+        assert (concepts, relationships) == rows(tmp_path / "rdflib.sqlite")
+        assert sorted(label for _, label in concepts) == ["Dos", "Uno"]
+        assert len(relationships) == 1
+
+    def test_register_normalizes_to_streaming_profile(self, manager, compact_skos_file):
+        """Test that @context is hoisted and nodes start with @id when storing the original"""
+        pytest.importorskip("ijson")
+        import json
+        document = json.loads(compact_skos_file.read_text())
+        reordered = {"@graph": [dict(reversed(list(node.items()))) for node in document["@graph"]],
+                     "@context": document["@context"]}
+        compact_skos_file.write_text(json.dumps(reordered))
+
+        metadata = manager.register_taxonomy("example", compact_skos_file, {})
+
+        stored_path = next((manager.taxonomies_dir / "example").glob("original.jsonld*"))
+        with taxonomy_manager_module._open_jsonld(stored_path) as f:
+            stored = f.read().decode("utf-8")
+        assert stored.startswith('{"@context":')
+        assert all(next(iter(node)) == "@id" for node in json.loads(stored)["@graph"])
+        assert metadata["concepts_count"] == 30
+
+    @pytest.mark.parametrize("streaming", [True, False])
+    def test_register_stores_compressed_original(self, manager, compact_skos_file, monkeypatch, streaming):
+        """Test that the original is stored with zstd and still ingested"""
+        zstandard = pytest.importorskip("zstandard")
+        if not streaming:
+            monkeypatch.setattr(taxonomy_manager_module, "ijson", None)
+
+        metadata = manager.register_taxonomy("example", compact_skos_file, {})
+
+        stored_path = manager.taxonomies_dir / "example" / "original.jsonld.zst"
+        with open(stored_path, "rb") as f:
+            restored = zstandard.ZstdDecompressor().stream_reader(f).read()
+        assert not (manager.taxonomies_dir / "example" / "original.jsonld").exists()
+        assert b"@graph" in restored
+        assert metadata["concepts_count"] == 30
+        assert metadata["file_size_mb"] == round(compact_skos_file.stat().st_size / (1024 * 1024), 2)
+
+    @pytest.mark.parametrize("streaming", [True, False])
+    def test_compressed_input_validates_and_registers(self, manager, compact_skos_file, tmp_path, monkeypatch, streaming):
+        """Test that .jsonld.zst files are read through the decompressing stream"""
+        zstandard = pytest.importorskip("zstandard")
+        if not streaming:
+            monkeypatch.setattr(taxonomy_manager_module, "ijson", None)
+        compressed = tmp_path / "taxonomy.jsonld.zst"
+        compressed.write_bytes(zstandard.ZstdCompressor().compress(compact_skos_file.read_bytes()))
+
+        result = manager.validate_skos_file(str(compressed))
+        metadata = manager.register_taxonomy("example", compressed, {})
+
+        assert result["valid"], result["errors"]
+        assert result["statistics"] == manager.validate_skos_file(str(compact_skos_file))["statistics"]
+        assert metadata["concepts_count"] == 30
+        stored_path = manager.taxonomies_dir / "example" / "original.jsonld.zst"
+        with open(stored_path, "rb") as f:
+            assert b"@graph" in zstandard.ZstdDecompressor().stream_reader(f).read()
+
+    def test_register_without_zstandard(self, manager, compact_skos_file, monkeypatch):
+        """Test that the original is stored uncompressed when zstandard is missing"""
+        monkeypatch.setattr(taxonomy_manager_module, "zstandard", None)
+
+        metadata = manager.register_taxonomy("example", compact_skos_file, {})
+
+        assert (manager.taxonomies_dir / "example" / "original.jsonld").exists()
+        assert metadata["concepts_count"] == 30
+
+    def test_register_duplicate_id(self, manager, skos_file):
+        """Test that registering an existing id raises ValueError"""
+        manager.register_taxonomy("example", skos_file, {})
+
+        with pytest.raises(ValueError, match="ya existe"):
+            manager.register_taxonomy("example", skos_file, {})
+
+    def test_first_taxonomy_is_default_fallback(self, manager, skos_file):
+        """Test that the first registered taxonomy is used when none is default"""
+        manager.register_taxonomy("example", skos_file, {})
+
+        assert manager.get_default_taxonomy_id() == "example"
+
+    def test_set_default_and_delete(self, manager, skos_file):
+        """Test switching default taxonomy and deleting the previous one"""
+        manager.register_taxonomy("first", skos_file, {})
+        manager.register_taxonomy("second", skos_file, {})
+
+        manager.set_default_taxonomy("second")
+        assert manager.get_default_taxonomy_id() == "second"
+
+        manager.delete_taxonomy("second")
+        assert manager.get_default_taxonomy_id() == "first"
+        assert not (manager.taxonomies_dir / "second").exists()
+
+    def test_default_flags_stay_consistent(self, manager, skos_file):
+        """Test that switching default clears the previous default flag"""
+        manager.register_taxonomy("first", skos_file, {})
+        manager.register_taxonomy("second", skos_file, {})
+
+        manager.set_default_taxonomy("first")
+        manager.set_default_taxonomy("second")
+        manager.flush()
+
+        flags = {tax_id: meta["is_default"] for tax_id, meta in manager.list_taxonomies().items()}
+        assert flags == {"first": False, "second": True}
+        reloaded = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+        assert reloaded.get_default_taxonomy_id() == "second"
+
+    def test_metadata_persisted(self, manager, skos_file):
+        """Test that a new manager instance sees registered taxonomies"""
+        manager.register_taxonomy("example", skos_file, {"name": "Example"})
+        manager.flush()
+
+        reloaded = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+
+        assert reloaded.get_taxonomy_metadata("example")["name"] == "Example"
+        assert reloaded.get_db_path("example") is not None
+        with sqlite3.connect(reloaded.get_db_path("example")) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM concepts").fetchone()[0] == 30
+
+    def test_registration_timestamps(self, manager, skos_file):
+        """Test that one registration stamps created, updated and validated alike"""
+        before = datetime.now()
+        metadata = manager.register_taxonomy("example", skos_file, {})
+
+        created = datetime.fromisoformat(metadata["created_at"])
+        assert before <= created <= datetime.now()
+        assert metadata["updated_at"] == metadata["created_at"]
+        assert metadata["validation"]["validated_at"] == metadata["created_at"]
+
+
+class TestMetadataReload:
+    """Test atomic metadata writes and mtime-gated reloads"""
+
+    def test_save_leaves_no_temp_file(self, manager, skos_file):
+        """Test that metadata.json is replaced atomically"""
+        manager.register_taxonomy("example", skos_file, {})
+        manager.flush()
+
+        assert manager.metadata_file.exists()
+        assert not manager.metadata_file.with_name("metadata.json.tmp").exists()
+        assert not (manager.taxonomies_dir / "example" / "metadata.json.tmp").exists()
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_metadata_round_trip(self, manager, skos_file, monkeypatch, use_orjson):
+        """Test that metadata is written as compact UTF-8 JSON with or without orjson"""
+        if use_orjson:
+            pytest.importorskip("orjson")
+        else:
+            monkeypatch.setattr(taxonomy_manager_module, "orjson", None)
+        manager.register_taxonomy("example", skos_file, {"name": "Taxonomía"})
+        manager.flush()
+
+        raw = manager.metadata_file.read_bytes()
+        reloaded = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+
+        assert "Taxonomía".encode("utf-8") in raw
+        assert b"\n" not in raw
+        assert reloaded.list_taxonomies() == manager.list_taxonomies()
+
+    def test_global_file_is_an_index(self, manager, skos_file):
+        """Test that full metadata lives per taxonomy and is read on demand"""
+        manager.register_taxonomy("example", skos_file, {"name": "Ejemplo"})
+        manager.activate_taxonomy("example", active=False)
+        manager.flush()
+
+        index = json.loads(manager.metadata_file.read_text(encoding="utf-8"))
+        assert set(index["taxonomies"]["example"]) == set(taxonomy_manager_module.INDEX_FIELDS)
+
+        per_taxonomy = json.loads((manager.taxonomies_dir / "example" / "metadata.json").read_text(encoding="utf-8"))
+        assert per_taxonomy["is_active"] is False
+
+        reloaded = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+        assert reloaded._full_metadata == {}
+        metadata = reloaded.get_taxonomy_metadata("example")
+        assert metadata["name"] == "Ejemplo"
+        assert metadata["concepts_count"] == 30
+        assert list(reloaded._full_metadata) == ["example"]
+
+    def test_legacy_full_metadata_file(self, manager, skos_file):
+        """Test that a global file with full entries is served without per-taxonomy reads"""
+        manager.register_taxonomy("example", skos_file, {})
+        full = dict(manager.get_taxonomy_metadata("example"), concepts_count=7)
+        manager.metadata_file.write_text(json.dumps({"taxonomies": {"example": full}}), encoding="utf-8")
+
+        reloaded = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+
+        assert reloaded.get_taxonomy_metadata("example")["concepts_count"] == 7
+        assert set(reloaded.taxonomies["example"]) <= set(taxonomy_manager_module.INDEX_FIELDS)
+
+    def test_reload_only_when_file_changes(self, manager, skos_file, monkeypatch):
+        """Test that other instances pick up changes and skip unchanged files"""
+        monkeypatch.setattr(taxonomy_manager_module, "METADATA_RELOAD_TTL_SECONDS", 0.0)
+        manager.register_taxonomy("example", skos_file, {})
+        manager.flush()
+        other = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+        cached = other.taxonomies
+
+        other.list_taxonomies()
+        assert other.taxonomies is cached
+        assert list(other.get_active_taxonomies()) == ["example"]
+
+        manager.activate_taxonomy("example", active=False)
+        manager.flush()
+        assert other.get_active_taxonomies() == {}
+
+    def test_saves_are_deferred_to_background_flush(self, manager, skos_file, monkeypatch):
+        """Test that registration is written at once and later mutations by the background timer"""
+        monkeypatch.setattr(taxonomy_manager_module, "METADATA_FLUSH_DELAY_SECONDS", 0.3)
+        manager.register_taxonomy("example", skos_file, {})
+        assert manager.metadata_file.exists()
+        assert manager._flush_timer is None
+
+        manager.activate_taxonomy("example", active=False)
+        timer = manager._flush_timer
+
+        pending = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+        assert pending.get_taxonomy_metadata("example")["is_active"] is True
+        timer.join(timeout=5)
+
+        reloaded = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+        assert reloaded.get_taxonomy_metadata("example")["is_active"] is False
+        assert manager._flush_timer is None
+        assert not manager._metadata_dirty
+
+    def test_read_only_views_track_changes(self, manager, skos_file):
+        """Test that listings are read-only and the active view follows activation"""
+        manager.register_taxonomy("example", skos_file, {})
+        listing = manager.list_taxonomies()
+        active = manager.get_active_taxonomies()
+
+        with pytest.raises(TypeError):
+            listing["other"] = {}
+        assert manager.get_active_taxonomies() is active
+        assert list(active) == ["example"]
+
+        manager.activate_taxonomy("example", active=False)
+
+        assert manager.get_active_taxonomies() == {}
+        assert list(listing) == ["example"]
+
+
+class TestConnectionPool:
+    """Test pooled read-only SQLite connections"""
+
+    def test_connection_reused_and_read_only(self, manager, skos_file):
+        """Test that the same connection is reused and rejects writes"""
+        manager.register_taxonomy("example", skos_file, {})
+
+        with manager.get_db_connection("example") as first:
+            pass
+        with manager.get_db_connection("example") as second:
+            with pytest.raises(sqlite3.OperationalError):
+                second.execute("DELETE FROM concepts")
+
+        assert first is second
+        assert second.execute("SELECT COUNT(*) FROM concepts").fetchone()[0] == 30
+        manager.close_all()
+
+    def test_pool_lends_distinct_connections_and_caps_idle(self, manager, skos_file, monkeypatch):
+        """Test that nested checkouts get separate connections and only a few are kept"""
+        monkeypatch.setattr(taxonomy_manager_module, "READER_POOL_SIZE", 2)
+        manager.register_taxonomy("example", skos_file, {})
+
+        with manager.get_db_connection("example") as a, \
+                manager.get_db_connection("example") as b, \
+                manager.get_db_connection("example") as c:
+            assert len({id(a), id(b), id(c)}) == 3
+
+        assert manager._conn_pool["example"] == [c, b]
+        with pytest.raises(sqlite3.ProgrammingError):
+            a.execute("SELECT 1")
+        with manager.get_db_connection("example") as again:
+            assert again is b
+        manager.close_all()
+
+    def test_count_concepts_uses_metadata_unless_forced(self, manager, skos_file):
+        """Test that concept counts come from metadata and refresh from SQLite on demand"""
+        manager.register_taxonomy("example", skos_file, {})
+        manager.get_taxonomy_metadata("example")["concepts_count"] = 99
+
+        assert manager._count_concepts("example") == 99
+        assert manager._count_concepts("example", force_refresh=True) == 30
+        assert manager.get_taxonomy_metadata("example")["concepts_count"] == 30
+        assert manager._count_concepts("missing") == 0
+
+    def test_table_counts_from_stats_or_count(self, manager, skos_file):
+        """Test that row counts come from the stats table, with COUNT(*) for older databases"""
+        manager.register_taxonomy("example", skos_file, {})
+        conn = sqlite3.connect(manager.get_db_path("example"))
+        try:
+            assert dict(conn.execute("SELECT key, value FROM stats")) == {
+                "concepts_count": 30, "relationships_count": 54}
+            conn.execute("UPDATE stats SET value = 7 WHERE key = 'concepts_count'")
+            assert taxonomy_manager_module._table_counts(conn)["concepts_count"] == 7
+
+            conn.execute("DROP TABLE stats")
+            assert taxonomy_manager_module._table_counts(conn) == {
+                "concepts_count": 30, "relationships_count": 54}
+        finally:
+            conn.close()
+
+    def test_delete_closes_pooled_connections(self, manager, skos_file):
+        """Test that deleting a taxonomy closes and evicts its connections"""
+        manager.register_taxonomy("first", skos_file, {})
+        manager.register_taxonomy("second", skos_file, {})
+        with manager.get_db_connection("second") as conn:
+            pass
+
+        manager.delete_taxonomy("second")
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        with pytest.raises(ValueError, match="no encontrada"):
+            with manager.get_db_connection("second"):
+                pass
+
+
+class TestFileHash:
+    """Test SHA-256 file hashing"""
+
+    @pytest.mark.parametrize("data", [b"", b"skos", b"x" * (3 * 1024 * 1024 + 7)])
+    def test_hash_matches_hashlib(self, manager, tmp_path, data):
+        """Test that mmap-based hashing matches hashlib for any file size"""
+        import hashlib
+        path = tmp_path / "file.bin"
+        path.write_bytes(data)
+
+        assert manager._calculate_file_hash(path) == f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+    def test_hash_cached_until_file_changes(self, manager, tmp_path, monkeypatch):
+        """Test that unchanged files are not re-read and changed files are rehashed"""
+        path = tmp_path / "file.bin"
+        path.write_bytes(b"first")
+        first_hash = manager._calculate_file_hash(path)
+
+        def fail(file_path):
+            raise AssertionError("file should not be rehashed")
+
+        monkeypatch.setattr(taxonomy_manager_module, "_hash_file_contents", fail)
+        reloaded = TaxonomyManager(taxonomies_dir=str(manager.taxonomies_dir))
+        assert reloaded._calculate_file_hash(path) == first_hash
+
+        monkeypatch.undo()
+        path.write_bytes(b"second version")
+        assert manager._calculate_file_hash(path) != first_hash
+
+    def test_hash_cache_evicts_least_recently_used(self, manager, tmp_path, monkeypatch):
+        """Test that the persisted hash cache keeps only the most recently used files"""
+        monkeypatch.setattr(taxonomy_manager_module, "HASH_CACHE_MAX_ENTRIES", 2)
+        paths = []
+        for name in ("a", "b", "c"):
+            path = tmp_path / f"{name}.bin"
+            path.write_bytes(name.encode())
+            paths.append(path)
+
+        manager._calculate_file_hash(paths[0])
+        manager._calculate_file_hash(paths[1])
+        manager._calculate_file_hash(paths[0])
+        manager._calculate_file_hash(paths[2])
+
+        cached = taxonomy_manager_module._read_json(manager.hash_cache_file)
+        assert list(cached) == [str(paths[0]), str(paths[2])]
+
+    def test_register_same_file_reuses_database(self, manager, skos_file, monkeypatch):
+        """Test that registering an identical file copies the existing database"""
+        manager.register_taxonomy("first", skos_file, {})
+
+        def fail(*args):
+            raise AssertionError("identical file should not be re-ingested")
+
+        monkeypatch.setattr(manager, "_process_taxonomy_to_sqlite", fail)
+        metadata = manager.register_taxonomy("second", skos_file, {})
+
+        assert metadata["concepts_count"] == 30
+        assert metadata["relationships_count"] == 54
+        assert metadata["file_hash"] == manager.get_taxonomy_metadata("first")["file_hash"]
+        first_dir = manager.taxonomies_dir / "first"
+        copied = [path.name for path in first_dir.iterdir()
+                  if path.name in ("taxonomy.sqlite", taxonomy_manager_module.LABEL_AUTOMATON_FILE)]
+        for name in copied:
+            assert (manager.taxonomies_dir / "second" / name).read_bytes() == (first_dir / name).read_bytes()
+
+    def test_prefault_is_advisory(self, skos_file, tmp_path, monkeypatch):
+        """Test that readahead hints never fail, with or without posix_fadvise"""
+        calls = []
+        monkeypatch.setattr(taxonomy_manager_module.os, "posix_fadvise",
+                            lambda fd, offset, length, advice: calls.append(advice), raising=False)
+        taxonomy_manager_module._prefault(skos_file)
+        taxonomy_manager_module._prefault(tmp_path / "missing.jsonld")
+
+        assert len(calls) == 2
+
+        monkeypatch.delattr(taxonomy_manager_module.os, "posix_fadvise")
+        taxonomy_manager_module._prefault(skos_file)
+
+
+class TestFastCopy:
+    """Test kernel-side file copies"""
+
+    def test_copy_preserves_content_and_mtime(self, tmp_path):
+        """Test that copies match the source bytes and modification time"""
+        import os
+        from utils.taxonomy_manager import _fast_copy
+        src = tmp_path / "src.jsonld"
+        src.write_bytes(b"{}" * 100000)
+        os.utime(src, (1_700_000_000, 1_700_000_000))
+        dst = tmp_path / "dst.jsonld"
+        dst.write_bytes(b"stale content that is longer than nothing")
+
+        _fast_copy(src, dst)
+
+        assert dst.read_bytes() == src.read_bytes()
+        assert dst.stat().st_mtime == src.stat().st_mtime
+
+
+class TestParallelRmtree:
+    """Test threaded directory removal"""
+
+    def test_removes_nested_tree(self, tmp_path):
+        """Test that nested files and directories are all removed"""
+        from utils.taxonomy_manager import _parallel_rmtree
+        root = tmp_path / "taxonomy"
+        for i in range(20):
+            nested = root / f"dir{i % 3}" / "sub"
+            nested.mkdir(parents=True, exist_ok=True)
+            (nested / f"file{i}.json").write_text("{}")
+        (root / "taxonomy.sqlite").write_bytes(b"")
+
+        _parallel_rmtree(root)
+
+        assert not root.exists()
+        assert tmp_path.exists()
+
+
+class TestSqliteSchema:
+    """Test the SQLite schema produced by ingestion"""
+
+    def test_relationship_lookups_use_indexes(self, manager, skos_file, tmp_path):
+        """Test that hierarchy and notation lookups are served by indexes"""
+        db_path = tmp_path / "schema.sqlite"
+        manager._process_taxonomy_to_sqlite(skos_file, db_path)
+
+        with sqlite3.connect(str(db_path)) as conn:
+            def plan(sql):
+                return " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", ("x",)))
+
+            assert "PRIMARY KEY" in plan("SELECT object FROM relationships WHERE subject = ? AND predicate = 'broader'")
+            assert "idx_rel_obj" in plan("SELECT subject FROM relationships WHERE object = ? AND predicate = 'broader'")
+            assert "idx_concepts_notation" in plan("SELECT uri FROM concepts WHERE notation = ?")
+
+    def test_ingest_builds_wal_database_atomically(self, manager, skos_file, tmp_path):
+        """Test that ingestion renames a finished WAL database and cleans up failures"""
+        db_path = tmp_path / "built.sqlite"
+        manager._process_taxonomy_to_sqlite(skos_file, db_path)
+
+        assert sorted(p.name for p in tmp_path.glob("built.sqlite*")) == ["built.sqlite"]
+        conn = sqlite3.connect(str(db_path))
+        assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        analyzed = {row[0] for row in conn.execute("SELECT idx FROM sqlite_stat1")}
+        conn.close()
+        assert {"idx_concepts_notation", "idx_rel_obj"} <= analyzed
+
+        broken = tmp_path / "broken.jsonld"
+        broken.write_text("{not json")
+        with pytest.raises(Exception):
+            manager._process_taxonomy_to_sqlite(broken, tmp_path / "failed.sqlite")
+        assert not list(tmp_path.glob("failed.sqlite*"))
+
+    def test_label_automaton_matches_text(self, manager, skos_file):
+        """Test that the prefLabel automaton finds labels inside free text"""
+        pytest.importorskip("ahocorasick")
+        manager.register_taxonomy("example", skos_file, {})
+
+        automaton = manager.get_automaton("example")
+        found = {concepts[0][0] for _, concepts in automaton.iter("Busco Concepto 20101 y CONCEPTO 3".lower())}
+
+        assert str(EX["concept/20101"]) in found
+        assert str(EX["concept/3"]) in found
+        assert manager.get_automaton("example") is automaton
+        assert not list((manager.taxonomies_dir / "example").glob("*.tmp"))
+
+    def test_ingest_rows_multi_values_and_remainder(self):
+        """Test that batched multi-VALUES inserts and their remainder store every row"""
+        statement, rows_per_insert = taxonomy_manager_module.MULTI_INSERT_STATEMENTS["relationships"]
+        assert statement.count("?") == 3 * rows_per_insert <= taxonomy_manager_module.SQLITE_MAX_VARIABLES
+
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE concepts (uri TEXT PRIMARY KEY, prefLabel TEXT, definition TEXT, notation TEXT, level INTEGER)")
+        conn.execute("CREATE TABLE relationships (subject TEXT, predicate TEXT, object TEXT, PRIMARY KEY (subject, predicate, object))")
+        total = 2 * rows_per_insert + 7
+        rows = [("relationships", (f"s{i}", "broader", "o")) for i in range(total)]
+        rows.append(("relationships", ("s0", "broader", "o")))
+        rows.append(("concepts", ("c", "label", "", "", 1)))
+
+        taxonomy_manager_module._ingest_rows(conn.cursor(), rows)
+
+        assert conn.execute("SELECT COUNT(*) FROM relationships").fetchone()[0] == total
+        assert conn.execute("SELECT prefLabel FROM concepts").fetchall() == [("label",)]
+        conn.close()
+
+
+class TestGlobalManager:
+    """Test the lazily created module-level manager"""
+
+    def test_singleton_and_compat_attribute(self):
+        """Test that the global manager is created once and still importable by name"""
+        manager = taxonomy_manager_module.get_taxonomy_manager()
+
+        assert taxonomy_manager_module.get_taxonomy_manager() is manager
+        assert taxonomy_manager_module.taxonomy_manager is manager
+        with pytest.raises(AttributeError):
+            taxonomy_manager_module.missing_attribute
@@ -10,11 +10,20 @@ Nueva API que utiliza el sistema unificado de entrada/salida:
 """
 
 from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
+from contextlib import asynccontextmanager
 import asyncio
+import httpx
+import itertools
 import logging
-from datetime import datetime
+import orjson
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from time import perf_counter_ns, time
 
 # Imports de la nueva arquitectura
 from core.data_gateway import (
@@ -32,19 +41,107 @@ from core.processing_pipeline import (
 # Imports para respuestas enriquecidas
 from core.enhanced_models import (
     EnhancedClassificationResponse, BatchEnhancedResponse, 
-    DetailLevel, EnhancedErrorResponse
+    DetailLevel, EnhancedErrorResponse, CostInfo, CostBreakdown, CostPerToken
 )
 from core.enhanced_classifier import enhanced_classifier
 
 # Imports existentes para compatibilidad
 from server.taxonomy_endpoints import taxonomy_router
+from utils.taxonomy_manager import close_taxonomy_manager
 
 logger = logging.getLogger(__name__)
 
+# IDs de lote/trabajo: prefijo aleatorio por proceso + contador monótono (sin syscalls por petición)
+_ID_PREFIX = secrets.token_hex(4)
+_ID_COUNTER = itertools.count(1)
+
+def _next_id(kind: str) -> str:
+    """Generar ID único dentro del proceso para lotes y trabajos"""
+    return f"{kind}_{_ID_PREFIX}_{next(_ID_COUNTER)}"
+
+# Estado de componentes resuelto una sola vez: los singletons no cambian en runtime
+_GATEWAY_OK = hasattr(data_gateway, 'process_request')
+_PIPELINE_OK = hasattr(processing_pipeline, 'process')
+_OUTPUT_OK = hasattr(output_manager, 'deliver_output')
+
+# Cuerpo de /health pre-serializado sin la llave de cierre; solo se añade el timestamp
+_HEALTH_BODY_HEAD = orjson.dumps({
+    "status": "healthy" if (_GATEWAY_OK and _PIPELINE_OK and _OUTPUT_OK) else "degraded",
+    "components": {
+        "data_gateway": "ok" if _GATEWAY_OK else "error",
+        "processing_pipeline": "ok" if _PIPELINE_OK else "error",
+        "output_manager": "ok" if _OUTPUT_OK else "error"
+    }
+})[:-1]
+
+# === REGISTRO DE TRABAJOS ASÍNCRONOS ===
+
+JOB_TTL_SECONDS = 3600
+JOB_SWEEP_INTERVAL_SECONDS = 300
+
+class AsyncJob:
+    """Estado de un trabajo asíncrono (con __slots__: sin dict por instancia)"""
+    __slots__ = ('status', 'submitted_at', 'finished_at', 'result', 'error')
+
+    def __init__(self, submitted_at: float):
+        self.status = "pending"
+        self.submitted_at = submitted_at
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error
+        }
+
+# Registro en memoria del proceso: /status/{job_id} solo encuentra los trabajos
+# creados por el mismo worker, por lo que requiere UVICORN_WORKERS=1
+_jobs: Dict[str, AsyncJob] = {}
+
+def _expire_jobs(now: float) -> int:
+    """Eliminar trabajos terminados hace más de JOB_TTL_SECONDS"""
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job.finished_at is not None and now - job.finished_at > JOB_TTL_SECONDS
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
+    return len(expired)
+
+async def _sweep_jobs():
+    """Tarea periódica que evita que el registro de trabajos crezca sin límite"""
+    while True:
+        await asyncio.sleep(JOB_SWEEP_INTERVAL_SECONDS)
+        removed = _expire_jobs(time())
+        if removed:
+            logger.info(f"🧹 {removed} trabajos asíncronos expirados eliminados")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cliente HTTP compartido, limpieza periódica de trabajos y cierre de conexiones SQLite"""
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(5.0, connect=2.0),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    )
+    sweeper = asyncio.create_task(_sweep_jobs())
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+        await app.state.http.aclose()
+        close_taxonomy_manager()
+
 app = FastAPI(
     title="🌟 Unified SKOS Classification API",
     description="API unificada con arquitectura centralizada para clasificación de productos SKOS",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Incluir router de taxonomías (mantener compatibilidad)
@@ -54,12 +151,16 @@ app.include_router(taxonomy_router, prefix="/taxonomies", tags=["Taxonomies"])
 
 class UnifiedProductRequest(BaseModel):
     """Request unificado para producto individual"""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     text: str = Field(..., description="Descripción del producto a clasificar", min_length=1)
     product_id: Optional[str] = Field(None, description="ID único del producto")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Metadatos adicionales")
 
 class UnifiedBatchRequest(BaseModel):
     """Request unificado para lote de productos"""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
     products: List[UnifiedProductRequest] = Field(..., description="Lista de productos", min_items=1, max_items=1000)
     batch_id: Optional[str] = Field(None, description="ID único del lote")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Metadatos del lote")
@@ -78,7 +179,7 @@ class UnifiedErrorResponse(BaseModel):
     error_code: str = Field(..., description="Código del error")
     error_message: str = Field(..., description="Mensaje del error")
     details: Dict[str, Any] = Field(default_factory=dict, description="Detalles adicionales")
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class SystemStats(BaseModel):
     """Estadísticas del sistema unificado"""
@@ -87,60 +188,62 @@ class SystemStats(BaseModel):
     output_stats: Dict[str, Any] = Field(..., description="Estadísticas de salida")
     uptime: str = Field(..., description="Tiempo de actividad")
 
+# Compilar esquemas al importar para no pagar el coste en la primera petición
+for _model in (UnifiedProductRequest, UnifiedBatchRequest, UnifiedResponse,
+               UnifiedErrorResponse, SystemStats):
+    _model.model_rebuild(force=True)
+
+@lru_cache(maxsize=8)
+def _detail_level(level: str) -> DetailLevel:
+    """Resolver nivel de detalle, con STANDARD como valor por defecto ante valores inválidos"""
+    try:
+        return DetailLevel(level)
+    except ValueError:
+        return DetailLevel.STANDARD
+
 # === ENDPOINTS PRINCIPALES ===
 
+_ROOT_INFO = {
+    "message": "🌟 Unified SKOS Classification API",
+    "version": "3.1.0",
+    "description": "API unificada con arquitectura centralizada y respuestas enriquecidas",
+    "features": [
+        "Data Gateway único para entrada",
+        "Processing Pipeline centralizado", 
+        "Output Manager unificado",
+        "Respuestas enriquecidas con análisis detallado",
+        "Niveles configurables de detalle",
+        "Análisis de confianza granular",
+        "Alternativas y conceptos relacionados",
+        "Compatibilidad completa con v2.x",
+        "Métricas integradas",
+        "Manejo robusto de errores"
+    ],
+    "endpoints": {
+        "/classify": "Clasificar producto individual",
+        "/classify/enhanced": "Clasificación con respuesta enriquecida",
+        "/classify/batch": "Clasificar lote de productos",
+        "/classify/async": "Clasificación asíncrona", 
+        "/status/{job_id}": "Estado de trabajo asíncrono",
+        "/stats": "Estadísticas del sistema",
+        "/health": "Estado del sistema",
+        "/taxonomies/*": "Gestión de taxonomías"
+    }
+}
+_ROOT_BODY = orjson.dumps(_ROOT_INFO)
+
 @app.get("/", response_model=Dict[str, Any])
 async def root():
     """Información de la API unificada"""
-    return {
-        "message": "🌟 Unified SKOS Classification API",
-        "version": "3.1.0",
-        "description": "API unificada con arquitectura centralizada y respuestas enriquecidas",
-        "features": [
-            "Data Gateway único para entrada",
-            "Processing Pipeline centralizado", 
-            "Output Manager unificado",
-            "Respuestas enriquecidas con análisis detallado",
-            "Niveles configurables de detalle",
-            "Análisis de confianza granular",
-            "Alternativas y conceptos relacionados",
-            "Compatibilidad completa con v2.x",
-            "Métricas integradas",
-            "Manejo robusto de errores"
-        ],
-        "endpoints": {
-            "/classify": "Clasificar producto individual",
-            "/classify/enhanced": "Clasificación con respuesta enriquecida",
-            "/classify/batch": "Clasificar lote de productos",
-            "/classify/async": "Clasificación asíncrona", 
-            "/stats": "Estadísticas del sistema",
-            "/health": "Estado del sistema",
-            "/taxonomies/*": "Gestión de taxonomías"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
     """Verificación de salud del sistema unificado"""
-    try:
-        # Verificar componentes principales
-        gateway_ok = hasattr(data_gateway, 'process_request')
-        pipeline_ok = hasattr(processing_pipeline, 'process')
-        output_ok = hasattr(output_manager, 'deliver_output')
-        
-        all_ok = gateway_ok and pipeline_ok and output_ok
-        
-        return {
-            "status": "healthy" if all_ok else "degraded",
-            "timestamp": datetime.now().isoformat(),
-            "components": {
-                "data_gateway": "ok" if gateway_ok else "error",
-                "processing_pipeline": "ok" if pipeline_ok else "error", 
-                "output_manager": "ok" if output_ok else "error"
-            }
-        }
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Health check failed: {str(e)}")
+    return Response(
+        content=_HEALTH_BODY_HEAD + b',"timestamp":' + orjson.dumps(datetime.now().isoformat()) + b'}',
+        media_type="application/json"
+    )
 
 @app.post("/classify", response_model=UnifiedResponse)
 async def classify_single_unified(
@@ -155,7 +258,7 @@ async def classify_single_unified(
     Flujo completo: Data Gateway → Processing Pipeline → Output Manager
     """
     try:
-        start_time = datetime.now()
+        t0 = perf_counter_ns()
         
         # Procesar a través del pipeline unificado
         result = await process_product_request(
@@ -184,7 +287,7 @@ async def classify_single_unified(
                 data=response_data,
                 metadata={
                     'format': output_format,
-                    'total_time_ms': (datetime.now() - start_time).total_seconds() * 1000
+                    'total_time_ms': (perf_counter_ns() - t0) / 1_000_000
                 }
             )
         else:
@@ -194,7 +297,7 @@ async def classify_single_unified(
                     error_code="CLASSIFICATION_FAILED",
                     error_message="Error en clasificación",
                     details={'errors': result.get('errors', [])}
-                ).dict()
+                ).model_dump(mode='json')
             )
             
     except HTTPException:
@@ -206,7 +309,7 @@ async def classify_single_unified(
             detail=UnifiedErrorResponse(
                 error_code="INTERNAL_ERROR",
                 error_message=f"Error interno del servidor: {str(e)}"
-            ).dict()
+            ).model_dump(mode='json')
         )
 
 @app.post("/classify/batch", response_model=UnifiedResponse)
@@ -214,7 +317,8 @@ async def classify_batch_unified(
     request: UnifiedBatchRequest,
     taxonomy: Optional[str] = Query(None, description="ID de taxonomía específica"),
     output_format: str = Query("json", description="Formato de salida"),
-    parallel_processing: bool = Query(True, description="Procesamiento paralelo")
+    parallel_processing: bool = Query(True, description="Procesamiento paralelo"),
+    max_concurrent: int = Query(10, description="Máximo de productos procesados en paralelo", ge=1, le=50)
 ):
     """
     📦 Clasificar lote de productos usando pipeline unificado
@@ -222,41 +326,29 @@ async def classify_batch_unified(
     Optimizado para grandes volúmenes con procesamiento paralelo opcional
     """
     try:
-        start_time = datetime.now()
+        t0 = perf_counter_ns()
         
-        # Convertir a formato para pipeline
-        products_data = [
-            {"text": p.text, "product_id": p.product_id}
-            for p in request.products
-        ]
+        batch_size = len(request.products)
         
         # Procesar lote a través del pipeline
-        if parallel_processing and len(products_data) > 5:
-            # Procesamiento paralelo para lotes grandes
-            chunk_size = max(1, len(products_data) // 4)  # Dividir en 4 chunks
-            chunks = [
-                products_data[i:i + chunk_size] 
-                for i in range(0, len(products_data), chunk_size)
-            ]
+        if parallel_processing and batch_size > 5:
+            # Procesamiento paralelo por producto, acotado por semáforo
+            # (asyncio.TaskGroup requiere Python 3.11; se mantiene gather por compatibilidad con 3.8)
+            semaphore = asyncio.Semaphore(max_concurrent)
             
-            # Procesar chunks en paralelo
-            tasks = [
-                process_batch_request(chunk, taxonomy_id=taxonomy)
-                for chunk in chunks
-            ]
+            async def _run(product: UnifiedProductRequest) -> Dict[str, Any]:
+                async with semaphore:
+                    return await process_product_request(
+                        text=product.text,
+                        product_id=product.product_id,
+                        taxonomy_id=taxonomy
+                    )
             
-            chunk_results = await asyncio.gather(*tasks)
+            all_results = await asyncio.gather(*(_run(p) for p in request.products))
             
             # Consolidar resultados
-            all_results = []
-            total_successful = 0
-            total_failed = 0
-            
-            for chunk_result in chunk_results:
-                if chunk_result['success']:
-                    all_results.extend(chunk_result['results'])
-                    total_successful += chunk_result['summary']['successful']
-                    total_failed += chunk_result['summary']['failed']
+            total_successful = sum(1 for r in all_results if r.get('success', False))
+            total_failed = len(all_results) - total_successful
             
             result = {
                 'success': True,
@@ -265,15 +357,17 @@ async def classify_batch_unified(
                     'total_processed': len(all_results),
                     'successful': total_successful,
                     'failed': total_failed,
-                    'processing_mode': 'parallel'
+                    'processing_mode': 'parallel',
+                    'max_concurrent': max_concurrent
                 }
             }
         else:
             # Procesamiento secuencial
+            products_data = [{"text": p.text, "product_id": p.product_id} for p in request.products]
             result = await process_batch_request(products_data, taxonomy_id=taxonomy)
             result['summary']['processing_mode'] = 'sequential'
         
-        processing_time = (datetime.now() - start_time).total_seconds() * 1000
+        processing_time = (perf_counter_ns() - t0) / 1_000_000
         
         return UnifiedResponse(
             success=True,
@@ -281,7 +375,7 @@ async def classify_batch_unified(
             processing_time_ms=processing_time,
             data=result,
             metadata={
-                'batch_size': len(request.products),
+                'batch_size': batch_size,
                 'processing_mode': result['summary']['processing_mode'],
                 'taxonomy_used': taxonomy
             }
@@ -294,7 +388,7 @@ async def classify_batch_unified(
             detail=UnifiedErrorResponse(
                 error_code="BATCH_ERROR",
                 error_message=f"Error procesando lote: {str(e)}"
-            ).dict()
+            ).model_dump(mode='json')
         )
 
 @app.post("/classify/async")
@@ -311,8 +405,8 @@ async def classify_async_unified(
     """
     try:
         # Generar ID único para seguimiento
-        import uuid
-        job_id = str(uuid.uuid4())
+        job_id = _next_id("job")
+        _jobs[job_id] = AsyncJob(submitted_at=time())
         
         # Agregar tarea al background
         background_tasks.add_task(
@@ -338,6 +432,14 @@ async def classify_async_unified(
             detail=f"Error iniciando procesamiento asíncrono: {str(e)}"
         )
 
+@app.get("/status/{job_id}")
+async def get_async_status(job_id: str):
+    """🔎 Consultar estado de un trabajo asíncrono"""
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Trabajo {job_id} no encontrado")
+    return ORJSONResponse({"job_id": job_id, **job.to_dict()})
+
 @app.get("/stats", response_model=SystemStats)
 async def get_system_stats():
     """📊 Estadísticas completas del sistema unificado"""
@@ -363,26 +465,40 @@ async def classify_products_compatibility(
 ):
     """🔄 Endpoint de compatibilidad con API v2.x"""
     try:
-        # Convertir formato v2.x a v3.0
+        # Ruta interna de confianza: despachar directo al pipeline sin
+        # reconstruir modelos v3.0 ni pasar por los endpoints unificados
         if "products" in request:
-            unified_request = UnifiedBatchRequest(
-                products=[
-                    UnifiedProductRequest(
-                        text=p.get("text", ""),
-                        product_id=p.get("product_id")
-                    )
-                    for p in request["products"]
-                ]
-            )
-            return await classify_batch_unified(unified_request, taxonomy)
+            products_data = [
+                {"text": p.get("text", ""), "product_id": p.get("product_id")}
+                for p in request["products"]
+            ]
+            result = await process_batch_request(products_data, taxonomy_id=taxonomy)
+            return ORJSONResponse({
+                "success": True,
+                "results": result["results"],
+                "summary": result["summary"]
+            })
         else:
             # Producto individual
-            unified_request = UnifiedProductRequest(
+            result = await process_product_request(
                 text=request.get("text", ""),
-                product_id=request.get("product_id")
+                product_id=request.get("product_id"),
+                taxonomy_id=taxonomy
             )
-            return await classify_single_unified(unified_request, taxonomy)
+            if not result['success']:
+                # Mismo 422 que /classify para que los clientes v2.x detecten el fallo
+                raise HTTPException(
+                    status_code=422,
+                    detail=UnifiedErrorResponse(
+                        error_code="CLASSIFICATION_FAILED",
+                        error_message="Error en clasificación",
+                        details={'errors': result.get('errors', [])}
+                    ).model_dump(mode='json')
+                )
+            return ORJSONResponse(result)
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -391,6 +507,20 @@ async def classify_products_compatibility(
 
 # === FUNCIONES DE BACKGROUND ===
 
+# Referencias fuertes a los webhooks en vuelo (asyncio solo guarda referencias débiles)
+_webhook_tasks = set()
+
+def _on_webhook_done(task: asyncio.Task):
+    """Registrar el resultado de un webhook fire-and-forget"""
+    _webhook_tasks.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error(f"❌ Error enviando webhook: {str(exc)}")
+    elif task.result().is_error:
+        logger.error(f"❌ Webhook respondió {task.result().status_code}")
+
 async def _process_async_batch(
     job_id: str,
     products: List[UnifiedProductRequest],
@@ -398,8 +528,11 @@ async def _process_async_batch(
     callback_url: Optional[str] = None
 ):
     """Procesar lote de forma asíncrona"""
+    job = _jobs.get(job_id)
     try:
         logger.info(f"🔄 Iniciando procesamiento asíncrono {job_id}")
+        if job is not None:
+            job.status = "processing"
         
         # Simular procesamiento (aquí iría la lógica real)
         await asyncio.sleep(2)  # Simular trabajo
@@ -411,16 +544,30 @@ async def _process_async_batch(
         ]
         
         result = await process_batch_request(products_data, taxonomy_id=taxonomy)
+        if job is not None:
+            job.result = result
+            job.status = "completed"
+            job.finished_at = time()
         
-        # Si hay callback URL, enviar notificación
+        # Si hay callback URL, enviar notificación sin bloquear al worker
         if callback_url:
-            # Aquí se implementaría el envío del webhook
             logger.info(f"📤 Enviando resultado a {callback_url}")
+            task = asyncio.create_task(app.state.http.post(
+                callback_url,
+                content=orjson.dumps({"job_id": job_id, **result}),
+                headers={"Content-Type": "application/json"}
+            ))
+            _webhook_tasks.add(task)
+            task.add_done_callback(_on_webhook_done)
         
         logger.info(f"✅ Procesamiento asíncrono {job_id} completado")
         
     except Exception as e:
         logger.error(f"❌ Error en procesamiento asíncrono {job_id}: {str(e)}")
+        if job is not None:
+            job.error = str(e)
+            job.status = "failed"
+            job.finished_at = time()
 
 # === ENDPOINTS ENRIQUECIDOS ===
 
@@ -451,10 +598,7 @@ async def classify_enhanced_endpoint(
     """
     try:
         # Validar nivel de detalle
-        try:
-            detail_enum = DetailLevel(detail_level)
-        except ValueError:
-            detail_enum = DetailLevel.STANDARD
+        detail_enum = _detail_level(detail_level)
         
         # Ejecutar clasificación enriquecida
         result = enhanced_classifier.classify_enhanced(
@@ -493,16 +637,10 @@ async def classify_batch_enhanced_endpoint(
     rendimiento con procesamiento concurrente controlado.
     """
     try:
-        import asyncio
-        from concurrent.futures import ThreadPoolExecutor
-        
         # Validar nivel de detalle
-        try:
-            detail_enum = DetailLevel(detail_level)
-        except ValueError:
-            detail_enum = DetailLevel.STANDARD
+        detail_enum = _detail_level(detail_level)
         
-        batch_id = f"batch_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        batch_id = _next_id("batch")
         
         # Función para procesar producto individual
         def process_single_product(product_request):
@@ -518,7 +656,7 @@ async def classify_batch_enhanced_endpoint(
                 return None
         
         # Procesamiento concurrente
-        start_time = time.time()
+        t0 = perf_counter_ns()
         with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
             results = list(executor.map(process_single_product, request.products))
         
@@ -526,11 +664,18 @@ async def classify_batch_enhanced_endpoint(
         successful_results = [r for r in results if r is not None]
         failed_count = len(results) - len(successful_results)
         
-        # Agregar costos (simplificado)
-        total_cost = sum(r.processing.ai_interaction.cost_info.total_usd 
-                        for r in successful_results)
+        # Agregar costos en una sola pasada sobre los resultados
+        total_cost = 0.0
+        prompt_tokens = completion_tokens = total_tokens = 0
+        for r in successful_results:
+            cost_info = r.processing.ai_interaction.cost_info
+            breakdown = cost_info.breakdown
+            total_cost += cost_info.total_usd
+            prompt_tokens += breakdown.prompt_tokens
+            completion_tokens += breakdown.completion_tokens
+            total_tokens += breakdown.total_tokens
         
-        processing_time = (time.time() - start_time) * 1000
+        processing_time = (perf_counter_ns() - t0) / 1_000_000
         
         return BatchEnhancedResponse(
             total=len(request.products),
@@ -546,12 +691,9 @@ async def classify_batch_enhanced_endpoint(
             aggregated_costs=CostInfo(
                 total_usd=total_cost,
                 breakdown=CostBreakdown(
-                    prompt_tokens=sum(r.processing.ai_interaction.cost_info.breakdown.prompt_tokens 
-                                    for r in successful_results),
-                    completion_tokens=sum(r.processing.ai_interaction.cost_info.breakdown.completion_tokens 
-                                        for r in successful_results),
-                    total_tokens=sum(r.processing.ai_interaction.cost_info.breakdown.total_tokens 
-                                   for r in successful_results)
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    total_tokens=total_tokens
                 ),
                 cost_per_token=CostPerToken(input=0.00000015, output=0.0000006)
             ),
@@ -565,45 +707,48 @@ async def classify_batch_enhanced_endpoint(
             detail=f"Error en procesamiento de lotes: {str(e)}"
         )
 
-@app.get("/classify/enhanced/formats")
-async def get_enhanced_formats():
-    """Obtener información sobre formatos de respuesta enriquecida disponibles"""
-    return {
-        "detail_levels": {
-            "basic": {
-                "description": "Solo clasificación principal y confianza",
-                "includes": ["concept_uri", "prefLabel", "confidence", "product_id"],
-                "response_size": "Mínimo"
-            },
-            "standard": {
-                "description": "Incluye alternativas y razonamiento básico",
-                "includes": ["clasificación principal", "alternativas", "razonamiento", "metadatos básicos"],
-                "response_size": "Medio"
-            },
-            "full": {
-                "description": "Respuesta completa con todos los metadatos",
-                "includes": ["todo lo anterior", "conceptos relacionados", "análisis de procesamiento", "métricas de calidad"],
-                "response_size": "Completo"
-            },
-            "debug": {
-                "description": "Información técnica adicional para desarrollo",
-                "includes": ["todo lo anterior", "detalles técnicos", "información de debugging"],
-                "response_size": "Máximo"
-            }
+_ENHANCED_FORMATS = {
+    "detail_levels": {
+        "basic": {
+            "description": "Solo clasificación principal y confianza",
+            "includes": ["concept_uri", "prefLabel", "confidence", "product_id"],
+            "response_size": "Mínimo"
+        },
+        "standard": {
+            "description": "Incluye alternativas y razonamiento básico",
+            "includes": ["clasificación principal", "alternativas", "razonamiento", "metadatos básicos"],
+            "response_size": "Medio"
         },
-        "compatibility": {
-            "legacy_format": "Disponible en campo 'legacy_format'",
-            "backward_compatible": "Mantiene compatibilidad total con v2.x"
+        "full": {
+            "description": "Respuesta completa con todos los metadatos",
+            "includes": ["todo lo anterior", "conceptos relacionados", "análisis de procesamiento", "métricas de calidad"],
+            "response_size": "Completo"
         },
-        "features": {
-            "confidence_analysis": "Análisis granular de confianza con factores explicativos",
-            "alternatives": "Hasta 3 conceptos alternativos con explicaciones",
-            "related_concepts": "Conceptos relacionados en jerarquía taxonómica",
-            "reasoning": "Razonamiento detallado del proceso de decisión",
-            "quality_metrics": "Métricas de calidad de entrada y procesamiento",
-            "recommendations": "Recomendaciones automáticas basadas en confianza"
+        "debug": {
+            "description": "Información técnica adicional para desarrollo",
+            "includes": ["todo lo anterior", "detalles técnicos", "información de debugging"],
+            "response_size": "Máximo"
         }
+    },
+    "compatibility": {
+        "legacy_format": "Disponible en campo 'legacy_format'",
+        "backward_compatible": "Mantiene compatibilidad total con v2.x"
+    },
+    "features": {
+        "confidence_analysis": "Análisis granular de confianza con factores explicativos",
+        "alternatives": "Hasta 3 conceptos alternativos con explicaciones",
+        "related_concepts": "Conceptos relacionados en jerarquía taxonómica",
+        "reasoning": "Razonamiento detallado del proceso de decisión",
+        "quality_metrics": "Métricas de calidad de entrada y procesamiento",
+        "recommendations": "Recomendaciones automáticas basadas en confianza"
     }
+}
+_ENHANCED_FORMATS_BODY = orjson.dumps(_ENHANCED_FORMATS)
+
+@app.get("/classify/enhanced/formats")
+async def get_enhanced_formats():
+    """Obtener información sobre formatos de respuesta enriquecida disponibles"""
+    return Response(content=_ENHANCED_FORMATS_BODY, media_type="application/json")
 
 # === MANEJO DE ERRORES GLOBAL ===
 
@@ -625,5 +770,21 @@ async def global_exception_handler(request, exc):
     )
 
 if __name__ == "__main__":
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Con workers > 1 uvicorn exige la ruta del módulo ("unified_api:app"), no el objeto app.
+    # Por defecto un solo worker: cada proceso tiene su propio TaxonomyManager
+    # (pool de conexiones y escritura diferida de metadata.json), y dos workers
+    # que modifiquen metadatos a la vez se sobrescribirían los cambios. El
+    # registro de trabajos asíncronos (_jobs) también es local al proceso:
+    # con más de un worker, /status/{job_id} da 404 si lo atiende otro worker
+    uvicorn.run(
+        "unified_api:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.environ.get("UVICORN_WORKERS", "1")),
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+        access_log=False
+    )
\ No newline at end of file
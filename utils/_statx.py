@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+_statx.py - Lectura de tamaño y mtime vía statx(2) en Linux
+
+Pide al kernel solo STATX_SIZE | STATX_MTIME con AT_STATX_DONT_SYNC, de modo
+que en sistemas de archivos remotos no se fuerza la sincronización de
+atributos ya cacheados. En otras plataformas, kernels < 4.11 o glibc sin
+statx se usa os.stat.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import sys
+
+AT_FDCWD = -100
+AT_SYMLINK_NOFOLLOW = 0x100
+AT_STATX_DONT_SYNC = 0x4000
+STATX_MTIME = 0x40
+STATX_SIZE = 0x200
+
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ("tv_sec", ctypes.c_int64),
+        ("tv_nsec", ctypes.c_uint32),
+        ("__reserved", ctypes.c_int32),
+    ]
+
+
+class _Statx(ctypes.Structure):
+    """struct statx de <linux/stat.h> (256 bytes)"""
+    _fields_ = [
+        ("stx_mask", ctypes.c_uint32),
+        ("stx_blksize", ctypes.c_uint32),
+        ("stx_attributes", ctypes.c_uint64),
+        ("stx_nlink", ctypes.c_uint32),
+        ("stx_uid", ctypes.c_uint32),
+        ("stx_gid", ctypes.c_uint32),
+        ("stx_mode", ctypes.c_uint16),
+        ("__spare0", ctypes.c_uint16),
+        ("stx_ino", ctypes.c_uint64),
+        ("stx_size", ctypes.c_uint64),
+        ("stx_blocks", ctypes.c_uint64),
+        ("stx_attributes_mask", ctypes.c_uint64),
+        ("stx_atime", _StatxTimestamp),
+        ("stx_btime", _StatxTimestamp),
+        ("stx_ctime", _StatxTimestamp),
+        ("stx_mtime", _StatxTimestamp),
+        ("stx_rdev_major", ctypes.c_uint32),
+        ("stx_rdev_minor", ctypes.c_uint32),
+        ("stx_dev_major", ctypes.c_uint32),
+        ("stx_dev_minor", ctypes.c_uint32),
+        ("__spare2", ctypes.c_uint64 * 14),
+    ]
+
+
+def _load_statx():
+    """Resolver libc.statx una sola vez; None si no está disponible"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        func = libc.statx
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(_Statx)]
+    func.restype = ctypes.c_int
+    return func
+
+
+_statx = _load_statx()
+
+
+def stat_size_mtime(path):
+    """
+    Obtiene tamaño y fecha de modificación de un archivo sin seguir symlinks
+
+    Args:
+        path: Ruta del archivo (str o PathLike)
+
+    Returns:
+        tuple: (tamaño en bytes, mtime en segundos epoch como float)
+
+    Raises:
+        OSError: Si el archivo no se puede consultar
+    """
+    global _statx
+    if _statx is not None:
+        buf = _Statx()
+        rc = _statx(AT_FDCWD, os.fsencode(path), AT_SYMLINK_NOFOLLOW | AT_STATX_DONT_SYNC,
+                    STATX_SIZE | STATX_MTIME, ctypes.byref(buf))
+        if rc == 0:
+            mtime = buf.stx_mtime
+            return buf.stx_size, mtime.tv_sec + mtime.tv_nsec / 1e9
+        err = ctypes.get_errno()
+        if err != errno.ENOSYS:
+            raise OSError(err, os.strerror(err), os.fspath(path))
+        # Kernel sin statx: no volver a intentarlo en este proceso
+        _statx = None
+    st = os.stat(path, follow_symlinks=False)
+    return st.st_size, st.st_mtime
@@ -4,56 +4,177 @@ clean_exports.py - Utilidad para limpiar archivos de exportación antiguos
 """
 import os
 import sys
+import time
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
 # Agregar el directorio padre al PATH para importar utils
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from utils.export_config import get_cleanup_config, EXPORTS_BASE_DIR
+from utils.export_config import get_cleanup_config, EXPORTS_BASE_DIR, EXPORT_EXTENSIONS, SUBDIRS
+from utils._statx import stat_size_mtime
 
-def get_file_age_days(file_path):
+# io_uring (opcional): envía los unlinkat en lotes con un solo syscall por lote
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+BYTES_PER_MB = 1024 * 1024
+SECONDS_PER_DAY = 86400
+SCAN_MAX_WORKERS = 32
+URING_BATCH_SIZE = 128
+
+DEFAULT_EXTENSIONS = frozenset({'.csv', '.xlsx', '.json', '.tmp', '.log'})
+SPECIAL_FILES = frozenset({'.gitignore', 'README.md'})
+
+# Subdirectorio de exports que contiene cada extensión (ej: '.csv' -> 'csv')
+EXTENSION_SUBDIRS = {ext: SUBDIRS[export_type] for export_type, ext in EXPORT_EXTENSIONS.items()}
+
+def _format_mtime(mtime):
+    """Formatea un mtime (segundos epoch) solo cuando se va a mostrar"""
+    return datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M')
+
+def _iter_files(base_dir, collect_dirs=None):
+    """
+    Recorre base_dir con os.scandir sin seguir symlinks
+    
+    Args:
+        base_dir: Directorio raíz del recorrido
+        collect_dirs: Si se indica una lista, los subdirectorios se agregan
+            a ella en lugar de recorrerse (recorrido de un solo nivel)
+        
+    Yields:
+        tuple: (os.DirEntry, tamaño en bytes, mtime) por cada archivo regular,
+        con una única consulta de metadatos (statx en Linux) por archivo
     """
-    Calcula la edad de un archivo en días
+    pending = deque([os.fspath(base_dir)])
+    while pending:
+        current = pending.popleft()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    # is_dir/is_file usan d_type: sin syscall adicional en Linux
+                    if entry.is_dir(follow_symlinks=False):
+                        (pending if collect_dirs is None else collect_dirs).append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        try:
+                            size, mtime = stat_size_mtime(entry.path)
+                        except OSError:
+                            continue
+                        yield entry, size, mtime
+        except OSError:
+            continue
+
+def _scan_one(directory, base_len, extensions, now, collect_dirs=None, limits=None):
+    """
+    Escanea un subárbol de exportaciones
     
     Args:
-        file_path: Ruta del archivo
+        directory: Directorio a recorrer
+        base_len: Longitud del prefijo (directorio base + separador) a
+            recortar para obtener rutas relativas
+        extensions: Extensiones a incluir
+        now: Instante de referencia (time.time() capturado una vez por escaneo)
+        collect_dirs: Ver _iter_files
+        limits: Tupla (retention_days, max_size_mb); si se indica, solo se
+            construye el diccionario de los archivos que superan algún umbral
         
     Returns:
-        int: Edad en días
+        tuple: (lista de diccionarios con info de archivos, total de archivos,
+        tamaño total en bytes) del subárbol
     """
-    try:
-        file_stat = file_path.stat()
-        file_time = datetime.fromtimestamp(file_stat.st_mtime)
-        age = datetime.now() - file_time
-        return age.days
-    except Exception:
-        return 0
+    files_info = []
+    total_count = 0
+    total_bytes = 0
+    for entry, size, mtime in _iter_files(directory, collect_dirs):
+        name = entry.name
+        # Extensión por slicing del nombre (misma semántica que Path.suffix)
+        dot = name.rfind('.')
+        if dot <= 0 or name[dot:].lower() not in extensions:
+            continue
+        # Saltar archivos especiales
+        if name in SPECIAL_FILES:
+            continue
+        
+        total_count += 1
+        total_bytes += size
+        size_mb = size / BYTES_PER_MB
+        age_days = int((now - mtime) // SECONDS_PER_DAY)
+        # Caso habitual en limpieza: ni antiguo ni grande, no se guarda nada
+        if limits is not None and age_days <= limits[0] and size_mb <= limits[1]:
+            continue
+        
+        files_info.append({
+            'path': Path(entry.path),
+            'name': name,
+            'relative_path': entry.path[base_len:],
+            'size_mb': size_mb,
+            'age_days': age_days,
+            'modified': mtime
+        })
+    return files_info, total_count, total_bytes
 
-def get_file_size_mb(file_path):
+def _scan_tree(base_dir, extensions, limits=None):
     """
-    Obtiene el tamaño de un archivo en MB
+    Recorre el directorio de exportaciones repartiendo subdirectorios entre hilos
     
     Args:
-        file_path: Ruta del archivo
+        base_dir: Directorio base
+        extensions: Extensiones a incluir (frozenset)
+        limits: Ver _scan_one
         
     Returns:
-        float: Tamaño en MB
+        tuple: (lista de file_info, total de archivos, tamaño total en bytes)
     """
-    try:
-        size_bytes = file_path.stat().st_size
-        return size_bytes / (1024 * 1024)
-    except Exception:
-        return 0
+    if not base_dir.exists():
+        return [], 0, 0
+    
+    now = time.time()
+    
+    # Archivos del nivel superior; los subdirectorios se reparten entre hilos
+    # (scandir/stat liberan el GIL, así que el I/O de metadatos se solapa)
+    # Rutas relativas por slicing: todas las entradas cuelgan de este prefijo
+    base_len = len(os.fspath(base_dir)) + 1
+    
+    subdirs = []
+    files_info, total_count, total_bytes = _scan_one(
+        base_dir, base_len, extensions, now, collect_dirs=subdirs, limits=limits
+    )
+    
+    # Si todas las extensiones pedidas tienen subdirectorio propio, no descender
+    # en el resto (ej: solo '.csv' nunca recorre excel/ ni json/)
+    if extensions.issubset(EXTENSION_SUBDIRS):
+        wanted = {EXTENSION_SUBDIRS[ext] for ext in extensions}
+        subdirs = [subdir for subdir in subdirs if os.path.basename(subdir) in wanted]
+    
+    if subdirs:
+        max_workers = min(SCAN_MAX_WORKERS, (os.cpu_count() or 1) * 4, len(subdirs))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_scan_one, subdir, base_len, extensions, now, limits=limits)
+                for subdir in subdirs
+            ]
+            for future in as_completed(futures):
+                sub_info, sub_count, sub_bytes = future.result()
+                files_info.extend(sub_info)
+                total_count += sub_count
+                total_bytes += sub_bytes
+    
+    return files_info, total_count, total_bytes
 
-def scan_export_files(base_dir=None, extensions=None):
+def scan_export_files(base_dir=None, extensions=None, sort=False):
     """
     Escanea archivos de exportación
     
     Args:
         base_dir: Directorio base (por defecto exports/)
         extensions: Lista de extensiones a buscar
+        sort: Si ordenar por fecha de modificación (más reciente primero);
+            la limpieza no necesita orden, solo los listados
         
     Returns:
         list: Lista de diccionarios con info de archivos
@@ -61,30 +182,209 @@ def scan_export_files(base_dir=None, extensions=None):
     if base_dir is None:
         base_dir = EXPORTS_BASE_DIR
         
-    if extensions is None:
-        extensions = ['.csv', '.xlsx', '.json', '.tmp', '.log']
+    extensions = DEFAULT_EXTENSIONS if extensions is None else frozenset(extensions)
     
-    files_info = []
+    files_info = _scan_tree(base_dir, extensions)[0]
+    if sort:
+        files_info.sort(key=lambda x: x['modified'], reverse=True)
+    return files_info
+
+def _scan_for_cleanup(retention_days, max_size_mb, base_dir=None):
+    """
+    Escanea exportaciones quedándose solo con los candidatos a eliminar
     
-    if not base_dir.exists():
-        return files_info
-    
-    for file_path in base_dir.rglob('*'):
-        if file_path.is_file() and file_path.suffix.lower() in extensions:
-            # Saltar archivos especiales
-            if file_path.name in ['.gitignore', 'README.md']:
-                continue
-                
-            files_info.append({
-                'path': file_path,
-                'name': file_path.name,
-                'relative_path': file_path.relative_to(base_dir),
-                'size_mb': get_file_size_mb(file_path),
-                'age_days': get_file_age_days(file_path),
-                'modified': datetime.fromtimestamp(file_path.stat().st_mtime)
-            })
-    
-    return sorted(files_info, key=lambda x: x['modified'], reverse=True)
+    Args:
+        retention_days: Días de retención
+        max_size_mb: Tamaño máximo por archivo en MB
+        base_dir: Directorio base (por defecto exports/)
+        
+    Returns:
+        tuple: (archivos que superan algún umbral, total de archivos,
+        tamaño total en MB)
+    """
+    if base_dir is None:
+        base_dir = EXPORTS_BASE_DIR
+    to_delete, total_count, total_bytes = _scan_tree(
+        base_dir, DEFAULT_EXTENSIONS, limits=(retention_days, max_size_mb)
+    )
+    return to_delete, total_count, total_bytes / BYTES_PER_MB
+
+def _unlink_at(file_info, dir_fds):
+    """
+    Elimina un archivo por nombre relativo al fd de su directorio (unlinkat)
+    
+    Returns:
+        tuple: (file_info, error o None)
+    """
+    dir_fd = dir_fds.get(os.path.dirname(file_info['path']))
+    try:
+        if isinstance(dir_fd, OSError):
+            raise dir_fd
+        os.unlink(file_info['name'], dir_fd=dir_fd)
+        return file_info, None
+    except OSError as e:
+        return file_info, e
+
+def _unlink_files_uring(files, dir_fds):
+    """
+    Elimina archivos enviando lotes de IORING_OP_UNLINKAT a un io_uring
+    
+    Args:
+        files: Lista de file_info a eliminar
+        dir_fds: fd (u OSError) por directorio padre
+        
+    Returns:
+        list: Tuplas (file_info, error o None), o None si io_uring no está
+        disponible en este kernel
+    """
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    try:
+        liburing.io_uring_queue_init(URING_BATCH_SIZE, ring)
+    except OSError:
+        return None
+    
+    results = []
+    try:
+        for start in range(0, len(files), URING_BATCH_SIZE):
+            batch = files[start:start + URING_BATCH_SIZE]
+            submitted = 0
+            for index, file_info in enumerate(batch):
+                dir_fd = dir_fds.get(os.path.dirname(file_info['path']))
+                if isinstance(dir_fd, OSError):
+                    continue
+                sqe = liburing.io_uring_get_sqe(ring)
+                liburing.io_uring_prep_unlink(sqe, file_info['name'], 0, dir_fd)
+                liburing.io_uring_sqe_set_data64(sqe, index)
+                submitted += 1
+            
+            outcomes = {}
+            if submitted:
+                liburing.io_uring_submit(ring)
+                liburing.io_uring_wait_cqes(ring, cqe, submitted)
+                ready = liburing.io_uring_cq_ready(ring)
+                for i in range(ready):
+                    entry = cqe[i]
+                    index = liburing.io_uring_cqe_get_data64(entry)
+                    try:
+                        entry.res  # liburing lanza OSError si el unlinkat falló
+                        outcomes[index] = None
+                    except OSError as e:
+                        outcomes[index] = e
+                liburing.io_uring_cq_advance(ring, ready)
+            
+            for index, file_info in enumerate(batch):
+                if index in outcomes:
+                    results.append((file_info, outcomes[index]))
+                else:
+                    # Directorio padre no disponible: reportar su error
+                    results.append(_unlink_at(file_info, dir_fds))
+    finally:
+        liburing.io_uring_queue_exit(ring)
+    return results
+
+def _unlink_files(files):
+    """
+    Elimina archivos en paralelo abriendo cada directorio padre una sola vez
+    
+    Los archivos se eliminan por nombre relativo al fd del directorio
+    (unlinkat), evitando que el kernel resuelva la ruta completa en cada
+    llamada. Con liburing instalado se envían en lotes vía io_uring; si no,
+    se usa un pool de hilos.
+    
+    Args:
+        files: Lista de file_info a eliminar
+        
+    Returns:
+        list: Tuplas (file_info, error o None) en el mismo orden que files
+    """
+    if not files:
+        return []
+    
+    if os.unlink not in os.supports_dir_fd:
+        results = []
+        for file_info in files:
+            try:
+                file_info['path'].unlink()
+                results.append((file_info, None))
+            except OSError as e:
+                results.append((file_info, e))
+        return results
+    
+    dir_fds = {}
+    try:
+        for file_info in files:
+            parent = os.path.dirname(file_info['path'])
+            if parent not in dir_fds:
+                try:
+                    dir_fds[parent] = os.open(parent, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+                except OSError as e:
+                    dir_fds[parent] = e
+        
+        if liburing is not None and sys.platform.startswith('linux'):
+            results = _unlink_files_uring(files, dir_fds)
+            if results is not None:
+                return results
+        
+        max_workers = min(SCAN_MAX_WORKERS, (os.cpu_count() or 1) * 4, len(files))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda file_info: _unlink_at(file_info, dir_fds), files))
+    finally:
+        for dir_fd in dir_fds.values():
+            if not isinstance(dir_fd, OSError):
+                os.close(dir_fd)
+
+def _remove_empty_dirs(path):
+    """
+    Elimina en post-orden los subdirectorios vacíos de path (path se conserva)
+    
+    La comprobación de vacío lee solo la primera entrada con os.scandir y el
+    borrado usa rmdir relativo al fd del directorio padre.
+    
+    Args:
+        path: Directorio raíz (str)
+        
+    Returns:
+        list: Rutas de los directorios eliminados
+    """
+    removed = []
+    try:
+        with os.scandir(path) as it:
+            subdirs = [entry.name for entry in it if entry.is_dir(follow_symlinks=False)]
+    except OSError:
+        return removed
+    if not subdirs:
+        return removed
+    
+    use_dir_fd = os.rmdir in os.supports_dir_fd
+    try:
+        parent_fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC) if use_dir_fd else None
+    except OSError:
+        return removed
+    try:
+        for name in subdirs:
+            child = os.path.join(path, name)
+            removed.extend(_remove_empty_dirs(child))
+            try:
+                with os.scandir(child) as it:
+                    empty = next(it, None) is None
+                if empty:
+                    if use_dir_fd:
+                        os.rmdir(name, dir_fd=parent_fd)
+                    else:
+                        os.rmdir(child)
+                    removed.append(child)
+            except OSError:
+                pass  # Ignorar directorios que cambiaron durante la limpieza
+    finally:
+        if parent_fd is not None:
+            os.close(parent_fd)
+    return removed
+
+def _write_lines(lines):
+    """Escribe todas las líneas con una sola llamada a sys.stdout.write"""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
 
 def cleanup_old_files(dry_run=True, retention_days=None, max_size_mb=None, verbose=True):
     """
@@ -106,13 +406,13 @@ def cleanup_old_files(dry_run=True, retention_days=None, max_size_mb=None, verbo
     if max_size_mb is None:
         max_size_mb = config['max_file_size_mb']
     
-    files_info = scan_export_files()
+    # Solo los candidatos llegan aquí; del resto basta con contarlos
+    to_delete, total_files, total_size_mb = _scan_for_cleanup(retention_days, max_size_mb)
     
-    # Clasificar archivos para eliminar
-    to_delete = []
+    # Motivos de eliminación
     reasons = []
     
-    for file_info in files_info:
+    for file_info in to_delete:
         delete_reasons = []
         
         # Archivos demasiado antiguos
@@ -123,15 +423,13 @@ def cleanup_old_files(dry_run=True, retention_days=None, max_size_mb=None, verbo
         if file_info['size_mb'] > max_size_mb:
             delete_reasons.append(f"grande ({file_info['size_mb']:.1f} MB)")
         
-        if delete_reasons:
-            to_delete.append(file_info)
-            reasons.append(", ".join(delete_reasons))
+        reasons.append(", ".join(delete_reasons))
     
     # Estadísticas
     stats = {
-        'total_files': len(files_info),
+        'total_files': total_files,
         'files_to_delete': len(to_delete),
-        'total_size_mb': sum(f['size_mb'] for f in files_info),
+        'total_size_mb': total_size_mb,
         'delete_size_mb': sum(f['size_mb'] for f in to_delete),
         'retention_days': retention_days,
         'max_size_mb': max_size_mb,
@@ -152,41 +450,36 @@ def cleanup_old_files(dry_run=True, retention_days=None, max_size_mb=None, verbo
         return stats
     
     if verbose:
-        print(f"🗑️  Archivos para {'eliminar' if not dry_run else 'eliminar (simulación)'}:")
+        # Una sola escritura para todo el listado en lugar de 4 print() por archivo
+        lines = [f"🗑️  Archivos para {'eliminar' if not dry_run else 'eliminar (simulación)'}:"]
         for file_info, reason in zip(to_delete, reasons):
-            print(f"   📄 {file_info['relative_path']}")
-            print(f"      💾 {file_info['size_mb']:.1f} MB | 📅 {file_info['modified'].strftime('%Y-%m-%d %H:%M')}")
-            print(f"      🔍 Razón: {reason}")
-            print()
+            lines.append(f"   📄 {file_info['relative_path']}")
+            lines.append(f"      💾 {file_info['size_mb']:.1f} MB | 📅 {_format_mtime(file_info['modified'])}")
+            lines.append(f"      🔍 Razón: {reason}")
+            lines.append("")
+        _write_lines(lines)
     
     # Eliminar archivos (si no es dry_run)
     deleted_count = 0
     deleted_size = 0
     
     if not dry_run:
-        for file_info in to_delete:
-            try:
-                file_info['path'].unlink()
+        lines = []
+        for file_info, error in _unlink_files(to_delete):
+            if error is None:
                 deleted_count += 1
                 deleted_size += file_info['size_mb']
-                if verbose:
-                    print(f"✅ Eliminado: {file_info['relative_path']}")
-            except Exception as e:
-                if verbose:
-                    print(f"❌ Error eliminando {file_info['relative_path']}: {e}")
-    
-    # Limpiar directorios vacíos
-    if not dry_run:
-        for root, dirs, files in os.walk(EXPORTS_BASE_DIR, topdown=False):
-            for dirname in dirs:
-                dir_path = Path(root) / dirname
-                try:
-                    if not any(dir_path.iterdir()):  # Directorio vacío
-                        dir_path.rmdir()
-                        if verbose:
-                            print(f"📁 Directorio vacío eliminado: {dir_path.relative_to(EXPORTS_BASE_DIR)}")
-                except Exception:
-                    pass  # Ignorar errores en directorios no vacíos
+                lines.append(f"✅ Eliminado: {file_info['relative_path']}")
+            else:
+                lines.append(f"❌ Error eliminando {file_info['relative_path']}: {error}")
+        
+        # Limpiar directorios vacíos
+        base_path = os.fspath(EXPORTS_BASE_DIR)
+        for dir_path in _remove_empty_dirs(base_path):
+            lines.append(f"📁 Directorio vacío eliminado: {dir_path[len(base_path) + 1:]}")
+        
+        if verbose:
+            _write_lines(lines)
     
     # Actualizar estadísticas
     stats.update({
@@ -223,24 +516,24 @@ def main():
     args = parser.parse_args()
     
     if args.list_only:
-        files_info = scan_export_files()
+        files_info = scan_export_files(sort=True)
         if not files_info:
             print("📂 No hay archivos de exportación")
             return
         
-        print(f"📂 Archivos de exportación en {EXPORTS_BASE_DIR}:")
-        print("=" * 80)
+        lines = [f"📂 Archivos de exportación en {EXPORTS_BASE_DIR}:", "=" * 80]
         
         total_size = 0
         for file_info in files_info:
-            print(f"📄 {file_info['relative_path']}")
-            print(f"   💾 {file_info['size_mb']:.1f} MB | "
-                  f"📅 {file_info['modified'].strftime('%Y-%m-%d %H:%M')} | "
-                  f"⏰ {file_info['age_days']} días")
+            lines.append(f"📄 {file_info['relative_path']}")
+            lines.append(f"   💾 {file_info['size_mb']:.1f} MB | "
+                         f"📅 {_format_mtime(file_info['modified'])} | "
+                         f"⏰ {file_info['age_days']} días")
             total_size += file_info['size_mb']
         
-        print("=" * 80)
-        print(f"📊 Total: {len(files_info)} archivos, {total_size:.1f} MB")
+        lines.append("=" * 80)
+        lines.append(f"📊 Total: {len(files_info)} archivos, {total_size:.1f} MB")
+        _write_lines(lines)
         return
     
     # Ejecutar limpieza
@@ -27,6 +27,14 @@ SUBDIRS = {
     'temp': 'temp'
 }
 
+# Extensión de archivo por tipo de export
+EXPORT_EXTENSIONS = {
+    'csv': '.csv',
+    'excel': '.xlsx',
+    'json': '.json',
+    'temp': '.tmp'
+}
+
 def get_export_path(export_type='csv', create_dirs=True, use_date_subdir=True):
     """
     Obtiene la ruta completa para un archivo de exportación
@@ -69,26 +77,10 @@ def generate_filename(base_name, export_type='csv', include_timestamp=True, cust
     Returns:
         str: Nombre completo del archivo
     """
-    extensions = {
-        'csv': '.csv',
-        'excel': '.xlsx', 
-        'json': '.json',
-        'temp': '.tmp'
-    }
-    
-    # Construir nombre
-    filename_parts = [base_name]
-    
-    if custom_suffix:
-        filename_parts.append(custom_suffix)
-        
-    if include_timestamp:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename_parts.append(timestamp)
-    
-    filename = "_".join(filename_parts) + extensions.get(export_type, '.txt')
+    suffix = f"_{custom_suffix}" if custom_suffix else ""
+    timestamp = datetime.now().strftime("_%Y%m%d_%H%M%S") if include_timestamp else ""
     
-    return filename
+    return f"{base_name}{suffix}{timestamp}{EXPORT_EXTENSIONS.get(export_type, '.txt')}"
 
 def get_full_export_path(base_name, export_type='csv', **kwargs):
     """
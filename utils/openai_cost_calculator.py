@@ -8,13 +8,17 @@ Utilidad para calcular costos de llamadas a la API de OpenAI basado en:
 - Precios actuales de OpenAI (septiembre 2025)
 """
 
-from typing import Dict, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
 from datetime import datetime
+from functools import lru_cache
 
-@dataclass
-class CostInfo:
-    """Información de costos de una llamada a OpenAI"""
+class CostInfo(NamedTuple):
+    """
+    Información de costos de una llamada a OpenAI
+    
+    Inmutable y sin __dict__ por instancia: los servicios que acumulan un
+    CostInfo por request guardan miles de ellos en memoria.
+    """
     model: str
     prompt_tokens: int
     completion_tokens: int
@@ -44,6 +48,25 @@ OPENAI_PRICING = {
     }
 }
 
+# Prefijos ordenados de mayor a menor longitud: el primer match es el más específico
+_PRICING_PREFIXES = tuple(sorted(OPENAI_PRICING, key=len, reverse=True))
+
+@lru_cache(maxsize=256)
+def _resolve_base_model(model: str) -> str:
+    """
+    Resuelve el modelo base de pricing para un nombre de modelo
+    
+    Args:
+        model (str): Modelo utilizado (ej: "gpt-4o-mini-2024-07-18")
+        
+    Returns:
+        str: Modelo base (ej: "gpt-4o-mini") o el nombre original si no hay coincidencia
+    """
+    for pricing_model in _PRICING_PREFIXES:
+        if model.startswith(pricing_model):
+            return pricing_model
+    return model
+
 def calculate_openai_cost(
     model: str,
     prompt_tokens: int,
@@ -63,14 +86,8 @@ def calculate_openai_cost(
     Raises:
         ValueError: Si el modelo no está en la lista de precios
     """
-    # Normalize model name to base model for pricing lookup
-    base_model = model
-    
     # Handle model names with dates (e.g., "gpt-4o-mini-2024-07-18" -> "gpt-4o-mini")
-    for pricing_model in OPENAI_PRICING.keys():
-        if model.startswith(pricing_model):
-            base_model = pricing_model
-            break
+    base_model = _resolve_base_model(model)
     
     if base_model not in OPENAI_PRICING:
         raise ValueError(f"Modelo '{model}' (base: '{base_model}') no encontrado en pricing. Modelos disponibles: {list(OPENAI_PRICING.keys())}")
@@ -88,12 +105,62 @@ def calculate_openai_cost(
         prompt_tokens=prompt_tokens,
         completion_tokens=completion_tokens,
         total_tokens=total_tokens,
-        prompt_cost_usd=round(prompt_cost, 6),
-        completion_cost_usd=round(completion_cost, 6),
-        total_cost_usd=round(total_cost, 6),
+        prompt_cost_usd=prompt_cost,
+        completion_cost_usd=completion_cost,
+        total_cost_usd=total_cost,
         timestamp=datetime.now().isoformat()
     )
 
+def calculate_openai_cost_batch(
+    model: str,
+    prompt_tokens: Sequence[int],
+    completion_tokens: Sequence[int]
+) -> Dict:
+    """
+    Calcula costos de muchas llamadas a OpenAI de un mismo modelo en forma vectorizada
+    
+    Pensado para reportes agregados de corridas grandes: no crea un CostInfo
+    ni un timestamp por llamada. Para una sola llamada usar calculate_openai_cost.
+    
+    Args:
+        model (str): Modelo utilizado (ej: "gpt-4o-mini-2024-07-18")
+        prompt_tokens: Tokens de prompt por llamada (lista o array NumPy)
+        completion_tokens: Tokens de completion por llamada (lista o array NumPy)
+        
+    Returns:
+        Dict: Arrays por llamada (prompt_cost_usd, completion_cost_usd,
+        total_cost_usd) y totales agregados
+        
+    Raises:
+        ValueError: Si el modelo no está en la lista de precios
+        ImportError: Si NumPy no está instalado
+    """
+    import numpy as np
+    
+    base_model = _resolve_base_model(model)
+    if base_model not in OPENAI_PRICING:
+        raise ValueError(f"Modelo '{model}' (base: '{base_model}') no encontrado en pricing. Modelos disponibles: {list(OPENAI_PRICING.keys())}")
+    
+    pricing = OPENAI_PRICING[base_model]
+    prompt = np.asarray(prompt_tokens, dtype=np.int64)
+    completion = np.asarray(completion_tokens, dtype=np.int64)
+    
+    prompt_cost = prompt.astype(np.float64) * (pricing["prompt"] / 1_000_000)
+    completion_cost = completion.astype(np.float64) * (pricing["completion"] / 1_000_000)
+    total_cost = prompt_cost + completion_cost
+    
+    return {
+        "model": model,
+        "base_model_for_pricing": base_model,
+        "calls": int(prompt.size),
+        "prompt_cost_usd": prompt_cost,
+        "completion_cost_usd": completion_cost,
+        "total_cost_usd": total_cost,
+        "total_prompt_tokens": int(prompt.sum()),
+        "total_completion_tokens": int(completion.sum()),
+        "grand_total_usd": float(total_cost.sum())
+    }
+
 def extract_usage_from_response(response) -> Tuple[int, int]:
     """
     Extrae información de usage de una respuesta de OpenAI
@@ -124,11 +191,7 @@ def format_cost_info(cost_info: CostInfo) -> Dict:
         Dict: Información formateada para API
     """
     # Normalize model name for pricing lookup
-    base_model = cost_info.model
-    for pricing_model in OPENAI_PRICING.keys():
-        if cost_info.model.startswith(pricing_model):
-            base_model = pricing_model
-            break
+    base_model = _resolve_base_model(cost_info.model)
     
     return {
         "model": cost_info.model,  # Keep original model name
@@ -137,10 +200,11 @@ def format_cost_info(cost_info: CostInfo) -> Dict:
             "completion_tokens": cost_info.completion_tokens,
             "total_tokens": cost_info.total_tokens
         },
+        # Redondeo solo para presentación; CostInfo conserva la precisión completa
         "cost_usd": {
-            "prompt": cost_info.prompt_cost_usd,
-            "completion": cost_info.completion_cost_usd,
-            "total": cost_info.total_cost_usd
+            "prompt": round(cost_info.prompt_cost_usd, 6),
+            "completion": round(cost_info.completion_cost_usd, 6),
+            "total": round(cost_info.total_cost_usd, 6)
         },
         "cost_breakdown": {
             "base_model_for_pricing": base_model,
@@ -1,10 +1,44 @@
 #!/usr/bin/env python3
 # utils/taxonomy_config.py - Configuración y gestión de taxonomías
 import os
-import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
 
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+METADATA_PATH = Path(__file__).parent.parent / "taxonomies" / "metadata.json"
+
+# Leída una vez al importar: la configuración de entorno no cambia en runtime
+DEFAULT_TAXONOMY = os.getenv("DEFAULT_TAXONOMY")
+
+# (st_mtime_ns, metadata) del último metadata.json parseado
+_metadata_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+
+def _load_metadata() -> Dict[str, Any]:
+    """
+    Carga metadata.json reutilizando el resultado mientras no cambie su mtime.
+    
+    Returns:
+        Dict[str, Any]: Contenido de metadata.json ({} si no existe)
+    """
+    global _metadata_cache
+    try:
+        mtime_ns = os.stat(METADATA_PATH).st_mtime_ns
+    except FileNotFoundError:
+        _metadata_cache = None
+        return {}
+    
+    if _metadata_cache is not None and _metadata_cache[0] == mtime_ns:
+        return _metadata_cache[1]
+    
+    with open(METADATA_PATH, 'rb') as f:
+        metadata = _loads(f.read())
+    _metadata_cache = (mtime_ns, metadata)
+    return metadata
+
 def get_default_taxonomy() -> str:
     """
     Obtiene la taxonomía por defecto desde variables de entorno o metadata.
@@ -13,24 +47,13 @@ def get_default_taxonomy() -> str:
         str: ID de la taxonomía por defecto
     """
     # Primero verificar variable de entorno
-    default_taxonomy = os.getenv("DEFAULT_TAXONOMY")
-    
-    if default_taxonomy:
-        return default_taxonomy
+    if DEFAULT_TAXONOMY:
+        return DEFAULT_TAXONOMY
     
-    # Si no hay variable de entorno, buscar en metadata.json
-    try:
-        metadata_path = Path(__file__).parent.parent / "taxonomies" / "metadata.json"
-        if metadata_path.exists():
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-                
-            # Buscar taxonomía marcada como default
-            for taxonomy_id, taxonomy_data in metadata.get("taxonomies", {}).items():
-                if taxonomy_data.get("is_default", False):
-                    return taxonomy_id
-    except Exception as e:
-        print(f"Warning: Error reading taxonomy metadata: {e}")
+    # Si no hay variable de entorno, buscar taxonomía marcada como default en metadata.json
+    for taxonomy_id, taxonomy_data in get_available_taxonomies().items():
+        if taxonomy_data.get("is_default", False):
+            return taxonomy_id
     
     # Fallback por defecto
     return "treew-skos"
@@ -43,11 +66,7 @@ def get_available_taxonomies() -> Dict[str, Dict[str, Any]]:
         Dict[str, Dict[str, Any]]: Diccionario con información de taxonomías
     """
     try:
-        metadata_path = Path(__file__).parent.parent / "taxonomies" / "metadata.json"
-        if metadata_path.exists():
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-            return metadata.get("taxonomies", {})
+        return _load_metadata().get("taxonomies", {})
     except Exception as e:
         print(f"Warning: Error reading taxonomy metadata: {e}")
     